@@ -1,30 +1,45 @@
 import streamlit as st
-import pandas as pd
 # import numpy as np
 import sqlite3
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import GradientBoostingClassifier
-from sklearn.metrics import accuracy_score
 from streamlit_option_menu import option_menu
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
+import tempfile
 from dotenv import load_dotenv
 
+import db
+import metrics
+import outbox
+
 # Load environment variables
 load_dotenv()
 
-# Email configuration
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
+# Email configuration (SMTP server settings live in outbox.py)
 EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
+# Users allowed to see admin-only summaries (comma-separated usernames)
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+
+@st.cache_resource
+def get_outbox_worker():
+    worker = outbox.OutboxWorker(username=EMAIL_USERNAME, password=EMAIL_PASSWORD)
+    worker.start()
+    return worker
+
+@st.cache_resource
+def get_session_store():
+    import sessions
+    return sessions.SessionStore()
+
+@st.cache_resource
+def get_feedback_writer():
+    import feedback_store
+    writer = feedback_store.FeedbackWriter()
+    writer.start()
+    return writer
+
 def send_login_email(user_email):
     try:
         # Check if email configuration is set
@@ -62,30 +77,11 @@ def send_login_email(user_email):
         """
         msg.attach(MIMEText(body, 'html'))
 
-        try:
-            # Create SMTP session
-            st.info("Connecting to SMTP server...")
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-            server.starttls()
-            
-            # Login to SMTP server
-            st.info("Authenticating with SMTP server...")
-            server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-            
-            # Send email
-            st.info("Sending email...")
-            server.send_message(msg)
-            server.quit()
-            
-            st.success("Email sent successfully!")
-            return True
-            
-        except smtplib.SMTPAuthenticationError:
-            st.error("Failed to authenticate with Gmail. Please check your email and app password in the .env file.")
-            return False
-        except smtplib.SMTPException as smtp_error:
-            st.error(f"SMTP error occurred: {str(smtp_error)}")
-            return False
+        # Queue the message; the outbox worker sends it in the background
+        worker = get_outbox_worker()
+        outbox.enqueue(msg)
+        worker.wake()
+        return True
             
     except Exception as e:
         st.error(f"Error sending email: {str(e)}")
@@ -225,62 +221,69 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# -------------------- Database Setup --------------------
-def create_tables():
-    conn = sqlite3.connect("users.db")
-    cursor = conn.cursor()
-    
-    # Create users table if not exists
-    cursor.execute('''CREATE TABLE IF NOT EXISTS users (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        username TEXT UNIQUE,
-                        password TEXT,
-                        email TEXT UNIQUE)''')
-
-    # Create feedback table if not exists
-    cursor.execute('''CREATE TABLE IF NOT EXISTS feedback (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user TEXT,
-                        feedback TEXT)''')
-    
-    conn.commit()
-    conn.close()
-
-conn = sqlite3.connect('users.db')
-c = conn.cursor()
+# -------------------- Metrics --------------------
+# Timing spans (sections, DB, SMTP, inference) are exported in Prometheus format when
+# METRICS_PORT (local /metrics endpoint) and/or METRICS_FILE are set
+@st.cache_resource
+def get_metrics_exporter():
+    if not (metrics.METRICS_PORT or metrics.METRICS_FILE):
+        return None
+    try:
+        return metrics.Exporter(port=metrics.METRICS_PORT, path=metrics.METRICS_FILE)
+    except OSError:
+        # Usually another app process on this host already serves METRICS_PORT; cached as
+        # a result here, so this process doesn't retry the bind on every rerun
+        metrics.log.warning("Could not serve metrics on port %s", metrics.METRICS_PORT, exc_info=True)
+        return metrics.Exporter(path=metrics.METRICS_FILE) if metrics.METRICS_FILE else None
 
-c.execute('''CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE,
-                password TEXT,
-                email TEXT UNIQUE)''')
+get_metrics_exporter()
 
-conn.commit()
+# -------------------- Database Setup --------------------
+# Schema creation runs once per process; queries borrow connections from db's per-database pool
+db.init_schema()
 
 # -------------------- Load Dataset --------------------
-@st.cache_data
-def load_data():
-    return pd.read_csv("heart.csv")
-
-data = load_data()
+# Heavy libraries are imported inside the loaders, and the loaders are only called by
+# the sections that need them, so the login page and Home never pay for pandas/sklearn.
+# The dataset is memory-mapped read-only from the columnar store in dataset.py and
+# shared by every session, so there is no per-rerun copy.
+# Keyed by dataset version (dataset.current_version), so ingested records show up
+# without restarting the app
+@st.cache_resource(max_entries=2)
+def load_data(dataset_key):
+    import dataset
+    with metrics.span("load.data"):
+        return dataset.load_frame(version=dataset_key)
+
+# Counts, means, correlations and histograms for EDA, maintained by eda_stats instead of
+# rescanning the frame on every visit
+@st.cache_resource(max_entries=2)
+def load_stats(dataset_key):
+    import eda_stats
+    return eda_stats.for_dataset(version=dataset_key)
+
+@st.cache_resource(max_entries=2)
+def build_history_index(dataset_key):
+    from history_index import RecordIndex
+    return RecordIndex(load_data(dataset_key))
+
+# Repeated inputs (e.g. the form defaults) are answered from an LRU keyed by model version
+@st.cache_resource
+def get_prediction_cache():
+    from prediction_cache import PredictionCache
+    return PredictionCache(shared_path=os.getenv("PREDICTION_CACHE_DB"))
 
 # -------------------- Train Model --------------------
-@st.cache_data
+# Trained models are persisted by model_store and memory-mapped read-only, as are the
+# compiled scorer tables, so sessions and worker processes on a host share one copy
+# A background Retrainer folds newly labeled records in and swaps the holder's model
+@st.cache_resource
 def train_model():
-    X = data[['age','sex','cp','trestbps','chol','fbs','restecg','thalach','exang','oldpeak','slope','ca','thal']]
-    y = data['target']
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=0)
-    model = GradientBoostingClassifier(n_estimators=100, learning_rate=1.0, max_depth=1, random_state=0)
-    model.fit(X_train, y_train)
-    accuracy = accuracy_score(y_test, model.predict(X_test))
-    return model, accuracy
-
-model, accuracy = train_model()
-
-# -------------------- Prediction --------------------
-def predict_heart_disease(model, input_data):
-    prediction = model.predict([input_data])
-    return prediction[0]
+    import retrain
+    with metrics.span("load.train_model"):
+        holder = retrain.load_holder()
+    retrain.Retrainer(holder).start()
+    return holder
 
 # -------------------- Navbar --------------------
 with st.sidebar:
@@ -296,26 +299,39 @@ with st.sidebar:
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 
+# Resume a previous login from its session token (a signature check, then one key lookup);
+# the token is swapped for a new one, so a copied URL stops working once it has been used
+if not st.session_state.logged_in and "session" in st.query_params:
+    resumed = get_session_store().rotate(st.query_params["session"])
+    if resumed:
+        st.session_state.logged_in = True
+        st.session_state.username, st.query_params["session"] = resumed
+    else:
+        del st.query_params["session"]
+
 def login():
     st.subheader("Login")
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
+    remember = st.checkbox("Remember me", help="Keeps you logged in on this browser for 12 hours "
+                           "through a link in the address bar. Don't use it on shared computers.")
     
     if st.button("Login"):
-        c.execute("SELECT * FROM users WHERE username = ? AND password = ?", (username, password))
-        result = c.fetchone()
+        # One query returns the user's email along with the match
+        result = db.find_user(username, password)
         
         if result:
             st.session_state.logged_in = True
             st.session_state.username = username
+            user_email = result[2]
             
-            # Get user's email from database
-            c.execute("SELECT email FROM users WHERE username = ?", (username,))
-            user_email = c.fetchone()[0]
+            # A signed token in the URL lets refreshes and bookmarks skip this form
+            if remember:
+                st.query_params["session"] = get_session_store().issue(username)
             
             # Send login notification email
             if send_login_email(user_email):
-                st.success("Login successful! A confirmation email has been sent to your registered email address.")
+                st.success("Login successful! A confirmation email is on its way to your registered email address.")
             else:
                 st.success("Login successful! (Email notification failed)")
         else:
@@ -329,9 +345,7 @@ def register():
     
     if st.button("Register"):
         try:
-            c.execute("INSERT INTO users (username, password, email) VALUES (?, ?, ?)", 
-                     (new_username, new_password, new_email))
-            conn.commit()
+            db.create_user(new_username, new_password, new_email)
             st.success("Registration successful! Please login.")
         except sqlite3.IntegrityError:
             st.error("Username or email already exists. Please try a different one.")
@@ -342,7 +356,7 @@ if not st.session_state.logged_in:
     # Create a container for login/register
     auth_container = st.container()
     
-    with auth_container:
+    with metrics.span("section.Login"), auth_container:
         # Create tabs for login and register
         tab1, tab2 = st.tabs(["Login", "Register"])
         
@@ -354,47 +368,34 @@ if not st.session_state.logged_in:
     
     st.stop()
 
+if st.sidebar.button("Log out"):
+    if "session" in st.query_params:
+        get_session_store().revoke(st.query_params["session"])
+        del st.query_params["session"]
+    st.session_state.logged_in = False
+    st.session_state.pop("username", None)
+    st.rerun()
+
+# Time the selected section; the span is closed at the end of the script
+section_span = metrics.span(f"section.{selected}")
+
+# Admins can capture a cProfile of a single rerun of the current page
+profiler = None
+if st.session_state.get("username") in ADMIN_USERS and st.sidebar.button("Profile this page"):
+    try:
+        profiler = metrics.Profiler(selected.replace(" ", "_")).start()
+    except ValueError:
+        st.sidebar.warning("Another rerun is being profiled; try again in a moment.")
+
 # -------------------- Home Section --------------------
 if selected == "Home":
-    # Add a custom header with gradient background
-    st.markdown("""
-        <div style='background: linear-gradient(to right, #ff4b4b, #ff6b6b); padding: 2rem; border-radius: 10px; margin-bottom: 2rem;'>
-            <h1 style='color: white; text-align: center; margin: 0;'>🏥 Cardiovascular Disease Prediction System</h1>
-        </div>
-    """, unsafe_allow_html=True)
-
-    # Add an image from an online source with custom styling
-    st.markdown("""
-        <div style='border-radius: 10px; overflow: hidden; box-shadow: 0 4px 8px rgba(0,0,0,0.1);'>
-    """, unsafe_allow_html=True)
-    st.image("https://source.unsplash.com/800x400/?heart,health", use_container_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # Welcome message with custom styling
-    st.markdown("""
-        <div style='background-color: #f8f9fa; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
-            <h3 style='color: #1f1f1f; margin-bottom: 1rem;'>💖 Welcome to the Cardiovascular Disease Prediction System!</h3>
-            <p style='color: #666;'>This application helps you predict the likelihood of heart disease based on several health parameters.</p>
-            <div style='margin-top: 1rem;'>
-                <h4 style='color: #1f1f1f;'>Key Features:</h4>
-                <ul style='list-style-type: none; padding: 0;'>
-                    <li style='margin: 0.5rem 0;'>🌡️ Real-time prediction using Machine Learning</li>
-                    <li style='margin: 0.5rem 0;'>📊 Data visualization and analysis</li>
-                    <li style='margin: 0.5rem 0;'>🏥 Doctor search and booking</li>
-                    <li style='margin: 0.5rem 0;'>💬 User feedback system</li>
-                    <li style='margin: 0.5rem 0;'>📱 Interactive health monitoring</li>
-                    <li style='margin: 0.5rem 0;'>🎯 Personalized health recommendations</li>
-                </ul>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-
-    # Health Statistics with custom styling
-    st.markdown("""
-        <div style='background-color: #ffffff; padding: 2rem; border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-            <h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>📊 Global Heart Disease Statistics</h3>
-    """, unsafe_allow_html=True)
-    
+    import home_page
+
+    # The static content is prebuilt into a few HTML blocks, one delta each
+    st.markdown(home_page.HEADER, unsafe_allow_html=True)
+    st.image(home_page.HERO_IMAGE, use_container_width=True)
+    st.markdown(home_page.INTRO, unsafe_allow_html=True)
+
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Annual Deaths", "17.9M", "↑ 2.1%", delta_color="inverse")
@@ -402,92 +403,21 @@ if selected == "Home":
         st.metric("Risk Factor Prevalence", "85%", "↑ 1.5%", delta_color="inverse")
     with col3:
         st.metric("Preventable Cases", "80%", "↓ 0.5%", delta_color="normal")
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    # Health Tips with custom styling
-    st.markdown("""
-        <div style='background-color: #f8f9fa; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
-            <h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>💡 Daily Health Tips</h3>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1rem;'>
-    """, unsafe_allow_html=True)
-    
-    tips = [
-        "🏃‍♂️ Exercise for at least 30 minutes daily",
-        "🥗 Eat a balanced diet rich in fruits and vegetables",
-        "💧 Stay hydrated - drink 8 glasses of water daily",
-        "😴 Get 7-8 hours of quality sleep",
-        "🧘‍♂️ Practice stress management techniques",
-        "🚭 Avoid smoking and limit alcohol consumption",
-        "🩺 Regular health check-ups are essential",
-        "🧠 Stay mentally active and socially connected"
-    ]
-    
-    for tip in tips:
-        st.markdown(f"""
-            <div style='background-color: #ffffff; padding: 1rem; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-                {tip}
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("</div></div>", unsafe_allow_html=True)
-
-    # Risk Factors with custom styling
-    st.markdown("""
-        <div style='background-color: #ffffff; padding: 2rem; border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
-            <h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>⚠️ Common Risk Factors</h3>
-            <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 1rem;'>
-    """, unsafe_allow_html=True)
-    
-    risk_factors = {
-        "High Blood Pressure": "Affects 1 in 3 adults",
-        "High Cholesterol": "Leading cause of heart disease",
-        "Diabetes": "Doubles heart disease risk",
-        "Obesity": "Increases risk by 40%",
-        "Smoking": "Major preventable cause",
-        "Physical Inactivity": "Affects 1 in 4 adults"
-    }
-    
-    for factor, stat in risk_factors.items():
-        st.markdown(f"""
-            <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px;'>
-                <strong style='color: #1f1f1f;'>{factor}:</strong><br>
-                <span style='color: #666;'>{stat}</span>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("</div></div>", unsafe_allow_html=True)
-
-    # Emergency Information with custom styling
-    st.markdown("""
-        <div style='background-color: #fff3cd; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
-            <h3 style='color: #856404; margin-bottom: 1.5rem;'>🚨 Emergency Warning Signs</h3>
-            <div style='color: #856404;'>
-                <p style='margin-bottom: 1rem;'>Seek immediate medical attention if you experience:</p>
-                <ul style='list-style-type: none; padding: 0;'>
-                    <li style='margin: 0.5rem 0;'>• Severe chest pain or pressure</li>
-                    <li style='margin: 0.5rem 0;'>• Shortness of breath</li>
-                    <li style='margin: 0.5rem 0;'>• Pain in arms, back, neck, or jaw</li>
-                    <li style='margin: 0.5rem 0;'>• Cold sweats</li>
-                    <li style='margin: 0.5rem 0;'>• Nausea or lightheadedness</li>
-                </ul>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
-
-    # Disclaimer with custom styling
-    st.markdown("""
-        <div style='background-color: #cce5ff; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
-            <h4 style='color: #004085; margin-bottom: 1rem;'>⚠️ Important Disclaimer</h4>
-            <p style='color: #004085; margin: 0;'>
-                This app is for informational purposes only. Always consult with healthcare professionals for medical advice and diagnosis.
-                In case of emergency, call your local emergency services immediately.
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
+
+    st.markdown(home_page.GUIDANCE, unsafe_allow_html=True)
 
 # -------------------- Prediction Section --------------------
 if selected == "Predict":
+    from schema import FEATURES, SchemaError
+    from batch import detect_format, score_file
+    from model_store import predict_heart_disease
+
+    # Take one consistent snapshot; a swap mid-rerun does not affect this request
+    serving = train_model().current
+    model, accuracy, model_version = serving.model, serving.accuracy, serving.version
+
     st.title("🩺 Predict Cardiovascular Disease")
+    st.caption(f"Model accuracy on held-out patients: {accuracy:.1%}")
     
     # Add BMI Calculator
     st.subheader("📊 BMI Calculator")
@@ -587,7 +517,12 @@ if selected == "Predict":
     }
 
     if st.button("Predict"):
-        prediction = predict_heart_disease(model, list(user_input.values()))
+        features = list(user_input.values())
+        # Kept for the what-if sweeps below, which rerun the script without this button
+        st.session_state.prediction_input = features
+        with metrics.span("predict.cached"):
+            prediction = get_prediction_cache().get_or_compute(
+                model_version, features, lambda: int(predict_heart_disease(model, features)))
         result = "Positive for Heart Disease" if prediction == 1 else "No Heart Disease"
         
         # Create a more detailed result display
@@ -625,80 +560,191 @@ if selected == "Predict":
               * Practice stress management
             """)
         
+        # The compiled scorer gives per-feature contributions at no extra cost
+        if hasattr(model, "contributions"):
+            contributions = model.contributions([features])[0]
+            top_factors = sorted(zip(FEATURES, contributions), key=lambda item: -abs(item[1]))[:5]
+            st.markdown("**Main factors in this prediction** (positive values raise the estimated risk):")
+            st.table([{"Factor": name, "Contribution": f"{value:+.2f}"} for name, value in top_factors])
+        
         # Add disclaimer
         st.info("""
         ⚠️ **Important Disclaimer:** This prediction is based on machine learning algorithms and should not be considered as a definitive medical diagnosis. 
         Always consult with healthcare professionals for proper medical advice and diagnosis.
         """)
 
+        if st.session_state.get("username") in ADMIN_USERS:
+            cache_stats = get_prediction_cache().stats()
+            st.caption(f"Prediction cache: {cache_stats['hit_rate']:.0%} hit rate "
+                       f"({cache_stats['hits'] + cache_stats['shared_hits']} hits, {cache_stats['misses']} misses, "
+                       f"{cache_stats['size']} entries)")
+
+    # What-if sweeps over the last submitted inputs, scored as one batch per chart
+    if "prediction_input" in st.session_state:
+        import time
+        import plotly.graph_objects as go
+        import whatif
+
+        st.markdown("---")
+        st.subheader("🔍 What-if Analysis")
+        st.write("See how the estimated risk would change if one or two of your values were different.")
+        base = st.session_state.prediction_input
+        col1, col2 = st.columns(2)
+        with col1:
+            x_feature = st.selectbox("Vary", FEATURES, index=FEATURES.index("chol"))
+        with col2:
+            y_feature = st.selectbox("Together with", ["(nothing else)"] + [f for f in FEATURES if f != x_feature])
+
+        started = time.perf_counter()
+        with metrics.span("predict.whatif"):
+            if y_feature == "(nothing else)":
+                values, risk = whatif.sweep(model, base, x_feature)
+                points = len(values)
+                fig = go.Figure(go.Scatter(x=values, y=risk, mode="lines", name="Estimated risk"))
+                fig.add_trace(go.Scatter(x=[base[FEATURES.index(x_feature)]], y=whatif.risk(model, [base]),
+                                         mode="markers", marker={"size": 12}, name="Your value"))
+                fig.update_layout(xaxis_title=x_feature, yaxis_title="Estimated risk", yaxis_range=[0, 1],
+                                  yaxis_tickformat=".0%")
+            else:
+                xs, ys, risk = whatif.sweep_2d(model, base, x_feature, y_feature)
+                points = risk.size
+                fig = go.Figure(go.Heatmap(x=xs, y=ys, z=risk.round(3), zmin=0, zmax=1, colorscale="RdYlGn_r",
+                                           colorbar={"title": "Risk", "tickformat": ".0%"}))
+                fig.add_trace(go.Scatter(x=[base[FEATURES.index(x_feature)]], y=[base[FEATURES.index(y_feature)]],
+                                         mode="markers", marker={"symbol": "x", "size": 12, "color": "black"},
+                                         name="Your values"))
+                fig.update_layout(xaxis_title=x_feature, yaxis_title=y_feature)
+        elapsed = time.perf_counter() - started
+        st.plotly_chart(fig)
+        st.caption(f"Scored {points:,} variations in {elapsed * 1000:.0f} ms")
+
+    # Batch prediction for uploaded patient files
+    st.markdown("---")
+    st.subheader("📁 Batch Prediction")
+    st.write("Upload a CSV or JSONL file with the columns: " + ", ".join(FEATURES)
+             + ". Any other columns, such as patient IDs, are kept in the results.")
+    uploaded_file = st.file_uploader("Patient file", type=["csv", "jsonl", "ndjson"])
+
+    if uploaded_file is not None and st.button("Run Batch Prediction"):
+        progress = st.empty()
+        results_file = tempfile.TemporaryFile(mode="w+", newline="")
+        try:
+            stats = score_file(model, uploaded_file, results_file, detect_format(uploaded_file.name),
+                               on_chunk=lambda s: progress.write(f"Scored {s.rows:,} rows ({s.rows_per_sec:,.0f} rows/sec)"))
+        except (SchemaError, ValueError) as e:
+            st.error(f"Could not score file: {e}")
+        else:
+            progress.empty()
+            st.success(f"Scored {stats.rows:,} patients in {stats.elapsed:.2f}s ({stats.rows_per_sec:,.0f} rows/sec)")
+            st.metric("Predicted Positive", f"{stats.positives:,}")
+            results_file.seek(0)
+            st.download_button("Download Results", results_file.read(),
+                               file_name="predictions.csv", mime="text/csv")
+        finally:
+            results_file.close()
+
 # -------------------- EDA Section --------------------
 if selected == "EDA":
+    import plotly.io as pio
+    import dataset
+    import eda_cache
+
+    # Charts are rendered once per dataset version and served from eda_cache
+    dataset_key = dataset.current_version()
+    data = load_data(dataset_key)
+    stats = load_stats(dataset_key)
+    # Render the EDA charts in the background whenever the dataset changes
+    eda_cache.prewarm(data, dataset_key, stats)
+
     st.title("📊 Data Visualization")
     
     # Add dataset overview
     st.subheader("Dataset Overview")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Records", len(data))
+        st.metric("Total Records", stats.n)
     with col2:
-        st.metric("Features", len(data.columns))
+        st.metric("Features", len(stats.columns))
     with col3:
-        st.metric("Heart Disease Cases", len(data[data['target'] == 1]))
+        st.metric("Heart Disease Cases", stats.positives())
 
     # Add age distribution
     st.subheader("Age Distribution")
-    fig = px.histogram(data, x='age', nbins=30, color='target',
-                      title='Age Distribution by Heart Disease Status')
-    st.plotly_chart(fig)
+    with metrics.span("eda.age_histogram"):
+        st.plotly_chart(pio.from_json(eda_cache.get("age_histogram.json", dataset_key, data, stats).decode()))
 
     st.subheader("Correlation Heatmap")
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.heatmap(data.corr(), annot=True, cmap="YlGnBu", linewidths=0.5, fmt=".2f", annot_kws={"size": 8})
-    st.pyplot(fig)
+    with metrics.span("eda.heatmap"):
+        st.image(eda_cache.get("heatmap.png", dataset_key, data, stats))
 
+    # Pairwise densities binned on the server, so the chart size does not grow with the rows
     st.subheader("Feature Distributions")
-    st.write("This may take a moment to load...")
-    sns.pairplot(data, hue='target', diag_kind='kde')
-    st.pyplot(plt)
+    with metrics.span("eda.pair_density"):
+        st.plotly_chart(pio.from_json(eda_cache.get("pair_density.json", dataset_key, data, stats).decode()))
+
+    st.subheader("Age vs Maximum Heart Rate")
+    with metrics.span("eda.age_thalach_scatter"):
+        st.plotly_chart(pio.from_json(eda_cache.get("age_thalach_scatter.json", dataset_key, data, stats).decode()))
 
     st.subheader("Chest Pain Type Distribution")
-    cp_counts = data['cp'].value_counts().reset_index()
-    cp_counts.columns = ['Chest Pain Type', 'Count']
-    fig = px.bar(cp_counts, x='Chest Pain Type', y='Count', color='Chest Pain Type')
-    st.plotly_chart(fig)
+    with metrics.span("eda.cp_bar"):
+        st.plotly_chart(pio.from_json(eda_cache.get("cp_bar.json", dataset_key, data, stats).decode()))
 
     # Add gender distribution
     st.subheader("Gender Distribution")
-    gender_counts = data['sex'].value_counts().reset_index()
-    gender_counts.columns = ['Gender', 'Count']
-    gender_counts['Gender'] = gender_counts['Gender'].map({1: 'Male', 0: 'Female'})
-    fig = px.pie(gender_counts, values='Count', names='Gender', title='Gender Distribution')
-    st.plotly_chart(fig)
+    with metrics.span("eda.gender_pie"):
+        st.plotly_chart(pio.from_json(eda_cache.get("gender_pie.json", dataset_key, data, stats).decode()))
 
 # -------------------- Medical History Section --------------------
 if selected == "Medical History":
+    import dataset
+
+    dataset_key = dataset.current_version()
+    data = load_data(dataset_key)
+    index = build_history_index(dataset_key)
+
     st.title("📖 Medical History")
     
     # Add search functionality
-    search_term = st.text_input("Search in medical records", "")
+    search_term = st.text_input("Search in medical records", "",
+                                help="Match values in any column (e.g. 63) or a specific one (e.g. cp:3 chol=233)")
     
     # Add filters
     col1, col2 = st.columns(2)
     with col1:
-        age_filter = st.slider("Age Range", int(data['age'].min()), int(data['age'].max()), (int(data['age'].min()), int(data['age'].max())))
+        age_filter = st.slider("Age Range", index.age_min, index.age_max, (index.age_min, index.age_max))
     with col2:
         target_filter = st.selectbox("Heart Disease Status", ["All", "Positive", "Negative"])
     
-    # Filter data based on user input
-    filtered_data = data[
-        (data['age'].between(age_filter[0], age_filter[1])) &
-        ((target_filter == "All") | 
-         (target_filter == "Positive" and data['target'] == 1) |
-         (target_filter == "Negative" and data['target'] == 0))
-    ]
+    # Filter through the precomputed indexes instead of masking the whole frame
+    result = index.query(age_filter, {"All": None, "Positive": 1, "Negative": 0}[target_filter], search_term)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", [25, 50, 100], index=1)
+    with col2:
+        page = st.number_input("Page", 1, result.pages(page_size), 1)
     
-    st.write(f"Showing {len(filtered_data)} records")
-    st.write(filtered_data)
+    # Only the visible page is sent to the browser
+    rows = result.page(page, page_size)
+    st.write(f"Showing {len(rows)} of {result.count} records (page {page} of {result.pages(page_size)})")
+    st.dataframe(data.iloc[rows])
+
+    # Export the whole filtered cohort, written chunk by chunk to a temporary file
+    export_format = st.radio("Export format", ["CSV", "Parquet"], horizontal=True)
+    if st.button(f"Export {result.count:,} records"):
+        import export
+
+        fmt = export_format.lower()
+        export_file = tempfile.TemporaryFile()
+        try:
+            with metrics.span(f"history.export.{fmt}"):
+                export.write_export(data, result, export_file, fmt)
+            export_file.seek(0)
+            st.download_button(f"Download {export_format}", export_file.read(), file_name=f"medical_history.{fmt}",
+                               mime=export.FORMATS[fmt])
+        finally:
+            export_file.close()
 
 # -------------------- Feedback Section --------------------
 if selected == "Feedback":
@@ -719,11 +765,32 @@ if selected == "Feedback":
     
     if st.button("Submit Feedback"):
         if feedback:
+            # Buffered and written in batches by the background feedback writer
+            get_feedback_writer().submit(st.session_state.get("username"), feedback, rating, feedback_category)
             st.success("Thank you for your feedback! We appreciate your input.")
-            # Here you would typically save the feedback to the database
         else:
             st.warning("Please provide some feedback before submitting.")
 
-# -------------------- Close Connection --------------------
-conn.close()
-
+    # Rating summary for admins, read from the materialized per-category stats
+    if st.session_state.get("username") in ADMIN_USERS:
+        import feedback_store
+
+        with st.expander("Feedback Summary (admin)"):
+            stats = feedback_store.summary()
+            if stats:
+                st.dataframe([{
+                    "Category": row["category"],
+                    "Responses": row["count"],
+                    "Average Rating": round(row["mean"], 2),
+                    **{f"{'⭐' * stars}": row["histogram"][stars - 1] for stars in range(1, 6)},
+                } for row in stats])
+            else:
+                st.write("No feedback yet.")
+
+# -------------------- Instrumentation --------------------
+section_span.stop()
+if profiler is not None:
+    report = profiler.stop()
+    with st.sidebar.expander("Profile of this rerun", expanded=True):
+        st.caption(f"Saved to {profiler.path}")
+        st.code(report)
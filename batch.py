@@ -0,0 +1,99 @@
+"""Chunked batch scoring of patient files (CSV or JSONL with the 13 feature columns, plus any others)."""
+
+import sys
+import time
+
+import pandas as pd
+
+import metrics
+from schema import FEATURES, SchemaError, validate_frame
+
+CHUNK_SIZE = 10_000
+
+
+def detect_format(name):
+    return 'jsonl' if str(name).lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def iter_chunks(source, fmt='csv', chunksize=CHUNK_SIZE):
+    # Only one chunk is held in memory at a time, whatever the file size
+    if fmt == 'jsonl':
+        reader = pd.read_json(source, lines=True, chunksize=chunksize)
+    else:
+        reader = pd.read_csv(source, chunksize=chunksize, encoding='utf-8-sig')
+    with reader:
+        yield from reader
+
+
+def score_chunk(model, chunk):
+    features = validate_frame(chunk)
+    with metrics.span("model.predict_batch"):
+        proba = model.predict_proba(features)
+    # Keep every column of the input (patient IDs, MRNs...) so results can be matched back
+    scored = chunk.copy()
+    scored[FEATURES] = features
+    scored['prediction'] = model.classes_[proba.argmax(axis=1)]
+    scored['probability'] = proba[:, list(model.classes_).index(1)].round(4)
+    return scored
+
+
+class BatchStats:
+    def __init__(self):
+        self.rows = 0
+        self.chunks = 0
+        self.positives = 0
+        self.started = time.perf_counter()
+
+    def update(self, scored):
+        self.rows += len(scored)
+        self.chunks += 1
+        self.positives += int((scored['prediction'] == 1).sum())
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def score_file(model, source, out, fmt='csv', chunksize=CHUNK_SIZE, on_chunk=None):
+    """Score ``source`` chunk by chunk, writing CSV rows to the text stream ``out``."""
+    stats = BatchStats()
+    for chunk in iter_chunks(source, fmt, chunksize):
+        try:
+            scored = score_chunk(model, chunk)
+        except SchemaError as e:
+            raise SchemaError(f"Chunk {stats.chunks + 1}: {e}") from None
+        scored.to_csv(out, header=stats.chunks == 0, index=False)
+        stats.update(scored)
+        if on_chunk:
+            on_chunk(stats)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+    import joblib
+    import retrain
+
+    parser = argparse.ArgumentParser(description="Score a patient file with the heart disease model")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--model", help="pickled model file (default: the model the app is serving)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.model:
+        model = joblib.load(args.model)
+        if isinstance(model, dict):
+            model = model["model"]
+    else:
+        # The latest retrained model, as served by the app and inference_service
+        model = retrain.load_holder().current.model
+    with open(args.output, "w", newline="") as out:
+        stats = score_file(model, args.input, out, detect_format(args.input), args.chunksize,
+                           on_chunk=lambda s: print(f"{s.rows} rows, {s.rows_per_sec:,.0f} rows/sec", file=sys.stderr))
+    print(f"Scored {stats.rows} rows in {stats.elapsed:.2f}s ({stats.rows_per_sec:,.0f} rows/sec), "
+          f"{stats.positives} positive", file=sys.stderr)
@@ -0,0 +1,268 @@
+"""Rerun latency and peak memory of one app process as concurrent sessions are added.
+
+Each simulated session is a Streamlit AppTest driven from its own thread,
+all in this one process, so they share ``st.cache_resource`` state the way
+sessions of one ``streamlit run`` server do. A session logs in through the
+form, then visits Predict (and submits the form), EDA, Medical History and
+Feedback (and submits feedback), timing every rerun. The menu component is
+replaced by one that reads the page from the session's state. Everything
+runs against a temporary users.db, model/store/cache directories and a stub
+SMTP server that requires the app to log in. The app's background threads
+are stopped (flushing buffered feedback) before the temporary directory is
+removed. Linux only (memory is read from /proc). The p99 ratio column
+compares each level with the first one.
+
+    python benchmarks/concurrent_sessions.py --sessions 1 2 4 8 --flows 3 --output sessions.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PAGE_KEY = "_load_test_page"
+STEPS = ["login", "predict", "predict.submit", "eda", "history", "feedback", "feedback.submit"]
+PASSWORD = "load-test"
+
+
+def rss():
+    """(current, peak) resident set size of this process, in bytes."""
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, value, _ = line.split()
+                fields[name.rstrip(":")] = int(value) * 1024
+    return fields["VmRSS"], fields["VmHWM"]
+
+
+class MemorySampler:
+    """Peak RSS seen between start() and stop(); VmHWM alone can't be reset between levels."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def start(self):
+        self.peak = rss()[0]
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss()[0])
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss()[0])
+        return self.peak
+
+
+def install_test_hooks():
+    import contextlib
+
+    import streamlit as st
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    # streamlit_option_menu is a custom component that AppTest can't click
+    def option_menu(menu_title, options, default_index=0, **kwargs):
+        return st.session_state.get(PAGE_KEY, options[default_index])
+
+    sys.modules["streamlit_option_menu"] = types.SimpleNamespace(option_menu=option_menu)
+    # A server compiles app.py once for all sessions; AppTest would recompile it on every
+    # rerun, which costs time the server doesn't spend (and races in the 3.11 compiler)
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+    # Each AppTest run installs a mock Runtime singleton and clears it when done, which
+    # pulls it out from under the other sessions; keep the first one for all of them
+    pinned = []
+
+    def instance(cls):
+        if not pinned and cls._instance is not None:
+            pinned.append(cls._instance)
+        if not pinned:
+            raise RuntimeError("Runtime hasn't been created!")
+        return pinned[0]
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: bool(pinned) or cls._instance is not None)
+    # AppTest patches config.get_option for the length of each run and restores whatever it
+    # found on exit, so overlapping runs undo each other's patch and widgets stop recording
+    # their test metadata (KeyError '$$ID-...'); set the option once for the whole process
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+
+# Daemon threads the app starts from st.cache_resource; they hold the temporary databases open
+BACKGROUND_THREADS = ("feedback-writer", "email-outbox", "retrainer", "eda-prewarm")
+
+
+def stop_background_threads(timeout=30):
+    for thread in threading.enumerate():
+        if thread.name in BACKGROUND_THREADS:
+            # FeedbackWriter.stop() writes out whatever is still buffered
+            thread.stop(timeout) if hasattr(thread, "stop") else thread.join(timeout)
+
+
+def run_flow(username, timings, errors, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    def step(name, at):
+        started = time.perf_counter()
+        at.run()
+        timings[name].append(time.perf_counter() - started)
+        if at.exception:
+            errors.append(f"{name}: {at.exception[0].value}")
+
+    def click(at, label):
+        next(b for b in at.button if b.label == label).click()
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    at.run()
+    inputs = {t.label: t for t in at.text_input}
+    inputs["Username"].input(username)
+    inputs["Password"].input(PASSWORD)
+    click(at, "Login")
+    step("login", at)
+    if not at.session_state.logged_in:
+        errors.append(f"login: {username} was not logged in")
+        return
+
+    at.session_state[PAGE_KEY] = "Predict"
+    step("predict", at)
+    click(at, "Predict")
+    step("predict.submit", at)
+    at.session_state[PAGE_KEY] = "EDA"
+    step("eda", at)
+    at.session_state[PAGE_KEY] = "Medical History"
+    step("history", at)
+    at.session_state[PAGE_KEY] = "Feedback"
+    step("feedback", at)
+    at.text_area[0].input("Load test feedback")
+    click(at, "Submit Feedback")
+    step("feedback.submit", at)
+
+
+def run_level(sessions, flows, timeout):
+    """Run ``sessions`` threads, each doing ``flows`` complete flows back to back."""
+    timings = {name: [] for name in STEPS}
+    errors = []
+
+    def session(number):
+        for _ in range(flows):
+            try:
+                run_flow(f"load{number}", timings, errors, timeout)
+            except Exception as e:
+                errors.append(f"session {number}: {e!r}")
+
+    sampler = MemorySampler().start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    peak = sampler.stop()
+
+    steps = {}
+    for name, samples in timings.items():
+        if samples:
+            samples.sort()
+            steps[name] = {"p50": statistics.median(samples),
+                           "p95": samples[min(len(samples) - 1, int(0.95 * len(samples)))],
+                           "p99": samples[min(len(samples) - 1, int(0.99 * len(samples)))],
+                           "count": len(samples)}
+    return {"sessions": sessions, "flows_per_sec": sessions * flows / elapsed, "elapsed": elapsed,
+            "peak_rss": peak, "steps": steps, "errors": errors}
+
+
+def print_level(level, baseline):
+    print(f"\n{level['sessions']} sessions: {level['flows_per_sec']:.2f} flows/sec, "
+          f"peak RSS {level['peak_rss'] / 2**20:.0f} MB, {len(level['errors'])} errors")
+    print(f"  {'step':16s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'p99 ratio':>9s}")
+    for name, s in level["steps"].items():
+        base = baseline["steps"].get(name) if baseline else None
+        ratio = f"{s['p99'] / base['p99']:8.1f}x" if base else f"{'':9s}"
+        print(f"  {name:16s} {s['p50'] * 1000:9.1f} {s['p95'] * 1000:9.1f} {s['p99'] * 1000:9.1f} {ratio}")
+    for error in level["errors"][:5]:
+        print(f"  ! {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--flows", type=int, default=3, help="complete flows per session at each level")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed for one rerun")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="app-load-")
+    # Set before any app module is imported, since they read these at import time
+    os.environ.update({
+        "USERS_DB": os.path.join(workdir, "users.db"),
+        "MODEL_DIR": os.path.join(workdir, "models"),
+        "DATA_STORE_DIR": os.path.join(workdir, "store"),
+        "EDA_CACHE_DIR": os.path.join(workdir, "eda"),
+        "PREDICTION_CACHE_DB": os.path.join(workdir, "predictions.db"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "SESSION_SECRET": "load-test",
+        "EMAIL_USERNAME": "app@localhost",
+        "EMAIL_PASSWORD": "unused",
+    })
+    from smtp_stub import StubSMTPServer
+    smtp = StubSMTPServer(credentials={"app@localhost": "unused"}, require_auth=True).start()
+    os.environ.update(SMTP_SERVER="127.0.0.1", SMTP_PORT=str(smtp.port), SMTP_STARTTLS="0")
+    try:
+        os.chdir(ROOT)
+
+        import db
+        import feedback_store
+        install_test_hooks()
+        for i in range(max(args.sessions)):
+            db.create_user(f"load{i}", PASSWORD, f"load{i}@localhost")
+
+        # One untimed flow trains the model, builds the store and renders the EDA charts
+        started = time.perf_counter()
+        warmup = run_level(1, 1, args.timeout)
+        print(f"Warm-up flow took {time.perf_counter() - started:.1f}s")
+        if warmup["errors"]:
+            raise SystemExit("Warm-up failed:\n" + "\n".join(warmup["errors"]))
+
+        levels = []
+        for sessions in args.sessions:
+            levels.append(run_level(sessions, args.flows, args.timeout))
+            print_level(levels[-1], levels[0] if len(levels) > 1 else None)
+        stop_background_threads()
+        submitted = sum(level["steps"].get("feedback.submit", {}).get("count", 0) for level in [warmup, *levels])
+        stored = sum(row["count"] for row in feedback_store.summary())
+        print(f"\nProcess peak RSS {rss()[1] / 2**20:.0f} MB; stub SMTP received {len(smtp.messages)} emails; "
+              f"{stored} of {submitted} feedback submissions stored")
+
+        if output:
+            with open(output, "w") as f:
+                json.dump({"flows": args.flows, "levels": levels, "process_peak_rss": rss()[1]}, f, indent=2)
+    finally:
+        stop_background_threads()
+        smtp.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Messages, bytes and render time of one visit to the Home page.
+
+Runs app.py headless through Streamlit's AppTest as a logged-in user on
+Home, captures the ForwardMsgs the rerun sends to the browser, and reports
+how many deltas there were, their serialized size and the median rerun
+time. Pass an older copy of app.py with ``--app`` to compare:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/home_render.py --app /tmp/app_before.py app.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure(app_path, repeat):
+    from streamlit.testing.v1 import AppTest, local_script_runner
+
+    captured = []
+    parse = local_script_runner.parse_tree_from_messages
+
+    def capture(messages):
+        captured[:] = list(messages)
+        return parse(messages)
+
+    local_script_runner.parse_tree_from_messages = capture
+    try:
+        at = AppTest.from_file(app_path, default_timeout=120)
+        at.session_state.logged_in = True
+        at.session_state.username = "home-render"
+        at.run()  # the first run also pays for imports and AppTest's component discovery
+        if at.exception:
+            raise SystemExit(f"{app_path}: {at.exception[0].value}")
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            times.append(time.perf_counter() - started)
+    finally:
+        local_script_runner.parse_tree_from_messages = parse
+
+    deltas = [m for m in captured if m.WhichOneof("type") == "delta"]
+    return {"app": app_path, "deltas": len(deltas), "delta_bytes": sum(m.ByteSize() for m in deltas),
+            "messages": len(captured), "message_bytes": sum(m.ByteSize() for m in captured),
+            "rerun_median": statistics.median(times), "repeat": repeat}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", nargs="+", default=[os.path.join(ROOT, "app.py")])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(p) for p in args.app]
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(ROOT)
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep the app's start-up writes out of the real users.db
+        os.environ["USERS_DB"] = os.path.join(workdir, "users.db")
+        results = [measure(path, args.repeat) for path in paths]
+    print(f"{'app':40s} {'deltas':>7s} {'bytes':>8s} {'messages':>9s} {'rerun ms':>9s}")
+    for r in results:
+        print(f"{os.path.relpath(r['app']):40s} {r['deltas']:7d} {r['delta_bytes']:8d} {r['messages']:9d} "
+              f"{r['rerun_median'] * 1000:9.1f}")
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Micro-benchmarks for the app's hot paths, run without the Streamlit UI.
+
+Covers dataset loading, model training, single-row prediction, the login
+user lookup and session resumption (plus queueing and sending the
+notification to a stub SMTP server) and the EDA chart renders with their
+payload sizes, at several synthetic dataset sizes. Everything runs against
+temporary directories and a temporary users.db.
+
+    python benchmarks/hotpaths.py run --sizes 303 10000 100000 --output base.json
+    python benchmarks/hotpaths.py compare base.json new.json --threshold 0.2
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from schema import RANGES  # noqa: E402
+
+DEFAULT_SIZES = [303, 10_000, 100_000]
+LOGIN_USERS = 1_000
+
+
+def synthetic_dataset(size, directory):
+    """heart.csv resampled to ``size`` rows with small jitter on the continuous columns."""
+    base = pd.read_csv(os.path.join(ROOT, "heart.csv"), encoding="utf-8-sig")
+    rng = np.random.default_rng(size)
+    frame = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+    for col, spread in (("age", 2), ("trestbps", 5), ("chol", 10), ("thalach", 5)):
+        frame[col] = (frame[col] + rng.integers(-spread, spread + 1, size)).clip(*RANGES[col])
+    path = os.path.join(directory, f"heart-{size}.csv")
+    frame.to_csv(path, index=False)
+    return path
+
+
+def timeit(fn, repeat, setup=None):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {"median": statistics.median(samples), "min": min(samples), "repeat": repeat}
+
+
+def bench_size(size, workdir, repeat):
+    import dataset
+    import eda_cache
+    import eda_stats
+    import model_store
+
+    dataset.STORE_DIR = os.path.join(workdir, f"store-{size}")
+    path = synthetic_dataset(size, workdir)
+    results = {}
+
+    results["load_data.csv"] = timeit(lambda: pd.read_csv(path, encoding="utf-8-sig"), repeat)
+    results["load_data.build_store"] = timeit(lambda: dataset.build_store(path), 1)
+    results["load_data.mmap"] = timeit(lambda: dataset.load_frame(path), repeat)
+
+    data = dataset.load_frame(path)
+    results["train_model"] = timeit(lambda: model_store.train(data, model_store.DEFAULT_PARAMS), max(1, repeat // 2))
+
+    model, _ = model_store.train(data, model_store.DEFAULT_PARAMS)
+    row = [50, 1, 0, 120, 200, 0, 1, 150, 0, 1.0, 1, 0, 2]
+    results["predict_heart_disease"] = timeit(lambda: [model_store.predict_heart_disease(model, row) for _ in range(100)], repeat)
+    results["predict_heart_disease"]["per_call"] = results["predict_heart_disease"]["median"] / 100
+
+    results["eda.stats_scan"] = timeit(lambda: eda_stats.scan(dataset.load_columns(path)), repeat)
+    stats = eda_stats.for_dataset(path)
+    for name, render in eda_cache.ARTIFACTS.items():
+        results[f"eda.{name}"] = timeit(lambda: render(data, stats), repeat)
+        # What the browser receives for the chart
+        results[f"eda.{name}"]["bytes"] = len(render(data, stats))
+    return results
+
+
+def bench_login(workdir, repeat):
+    import db
+    import outbox
+    import sessions
+    from email.mime.text import MIMEText
+    from smtp_stub import StubSMTPServer
+
+    db.DB_PATH = os.path.join(workdir, "users.db")
+    for i in range(LOGIN_USERS):
+        db.create_user(f"user{i}", "secret", f"user{i}@example.com")
+
+    def lookup():
+        for i in range(0, LOGIN_USERS, 10):
+            assert db.find_user(f"user{i}", "secret")
+
+    store = sessions.SessionStore()
+    tokens = [store.issue(f"user{i}") for i in range(0, LOGIN_USERS, 10)]
+
+    def resume():
+        for token in tokens:
+            assert store.validate(token)
+
+    def message():
+        msg = MIMEText("<p>Login Successful!</p>", "html")
+        msg["From"], msg["To"], msg["Subject"] = "app@example.com", "user1@example.com", "Successful Login"
+        return msg
+
+    # Authenticated like the Gmail configuration, so the connection cost includes AUTH
+    server = StubSMTPServer(credentials={"app@example.com": "secret"}, require_auth=True).start()
+    worker = outbox.OutboxWorker(host="127.0.0.1", port=server.port, username="app@example.com",
+                                 password="secret", starttls=False)
+    try:
+        results = {
+            "login.lookup": timeit(lookup, repeat),
+            "login.resume_session": timeit(resume, repeat),
+            "login.enqueue_email": timeit(lambda: [outbox.enqueue(message()) for _ in range(100)], repeat),
+        }
+        results["login.lookup"]["per_call"] = results["login.lookup"]["median"] / (LOGIN_USERS // 10)
+        results["login.resume_session"]["per_call"] = results["login.resume_session"]["median"] / len(tokens)
+        results["login.enqueue_email"]["per_call"] = results["login.enqueue_email"]["median"] / 100
+        results["login.send_queued"] = timeit(worker.drain, 1)
+        results["login.send_queued"]["emails"] = len(server.messages)
+    finally:
+        server.shutdown()
+        server.server_close()
+    return results
+
+
+def run(args):
+    import matplotlib
+    matplotlib.use("Agg")
+    # predict_heart_disease passes a plain list, like the app does
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"Benchmarking {size:,} rows...", file=sys.stderr)
+            for name, result in bench_size(size, workdir, args.repeat).items():
+                results[f"{name}@{size}"] = result
+        results.update(bench_login(workdir, args.repeat))
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    for name, result in results.items():
+        print(f"{name:40s} {result['median'] * 1000:10.2f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    for name in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[name]["median"], current[name]["median"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        # Ignore sub-millisecond timings, where scheduler noise dominates
+        if change > args.threshold and after - before > 0.001:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:40s} {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  {change:+7.1%}{flag}")
+    for name in sorted(baseline.keys() - current.keys()):
+        print(f"{name:40s} missing from current run")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--output", help="write results as JSON (e.g. a new baseline)")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Load generator for inference_service.py: latency percentiles against throughput.
+
+Each concurrency level runs that many closed-loop clients (one request in
+flight per keep-alive connection) for ``--duration`` seconds. By default the
+service is started on a free local port for the run; pass ``--port`` to
+target one that is already running.
+
+    python benchmarks/inference_load.py --concurrency 1 8 32 128 --duration 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+from schema import FEATURES, RANGES  # noqa: E402
+
+
+def random_instances(rng, count):
+    return [[round(float(rng.uniform(*RANGES[f])), 1) if f == "oldpeak" else int(rng.integers(RANGES[f][0], RANGES[f][1] + 1))
+             for f in FEATURES] for _ in range(count)]
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(host, port, payloads, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, _ = await request(reader, writer, host, "POST", "/predict", payloads[i % len(payloads)])
+            latencies.append(time.perf_counter() - started)
+            errors[0] += status != 200
+            i += 1
+    finally:
+        writer.close()
+
+
+async def health(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await request(reader, writer, host, "GET", "/health"))[1]
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, concurrency, duration, payloads):
+    before = await health(host, port)
+    latencies, errors = [], [0]
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, payloads[c::concurrency] or payloads, started + duration, latencies, errors)
+                           for c in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    after = await health(host, port)
+    batches = after["batches"] - before["batches"]
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": float(np.percentile(latencies, 99)) * 1000,
+        "mean_batch_requests": len(latencies) / batches if batches else 0.0,
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(host, port, process, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("inference service exited during startup")
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit("inference service did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="use a running service instead of starting one")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--rows", type=int, default=1, help="patients per request")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="batching window of a started service")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    payloads = [{"instances": random_instances(rng, args.rows)} for _ in range(1000)]
+
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "inference_service.py"), "--host", args.host,
+                                    "--port", str(port), "--max-wait-ms", str(args.max_wait_ms)], cwd=ROOT)
+        wait_until_up(args.host, port, process)
+
+    try:
+        results = []
+        print(f"{'clients':>8s} {'req/s':>10s} {'p50 ms':>9s} {'p99 ms':>9s} {'req/batch':>10s} {'errors':>7s}")
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_level(args.host, port, concurrency, args.duration, payloads))
+            results.append(result)
+            print(f"{concurrency:8d} {result['throughput']:10.0f} {result['p50_ms']:9.2f} {result['p99_ms']:9.2f} "
+                  f"{result['mean_batch_requests']:10.1f} {result['errors']:7d}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows_per_request": args.rows, "results": results}, f, indent=2)
+    sys.exit(1 if any(r["errors"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Measure import time and first paint of the login page in fresh processes.
+
+Each repetition starts a new interpreter, runs app.py headless through
+Streamlit's AppTest as an unauthenticated visitor, and records how long the
+first run took and which heavy libraries the app's own modules imported
+(Streamlit imports pandas itself when rendering components, which doesn't
+count). Exits non-zero if a heavy library leaks onto the login page or the
+median exceeds --max-seconds.
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "sklearn", "matplotlib", "seaborn", "plotly"]
+
+PROBE = r"""
+import importlib, json, os, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_ready = time.perf_counter()
+app_dir = os.path.dirname(os.path.abspath(sys.argv[1]))
+heavy = set(sys.argv[2:])
+importers = {}
+
+class Watch:
+    # Records which file first imports each heavy module; finds nothing itself
+    def find_spec(self, name, path=None, target=None):
+        if name in heavy and name not in sys.modules and name not in importers:
+            frame = sys._getframe(1)
+            while frame and frame.f_code.co_filename.startswith(("<frozen", os.path.dirname(importlib.__file__))):
+                frame = frame.f_back
+            importers[name] = frame.f_code.co_filename if frame else "?"
+        return None
+
+sys.meta_path.insert(0, Watch())
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+finished = time.perf_counter()
+print(json.dumps({
+    "streamlit_import": streamlit_ready - started,
+    "first_paint": finished - streamlit_ready,
+    "exception": [str(e.value) for e in at.exception],
+    # Only count what the app's own modules pulled in, not what Streamlit imports anyway
+    "heavy_loaded": sorted(m for m, f in importers.items() if os.path.abspath(f).startswith(app_dir + os.sep)),
+    "imported_by": importers,
+}))
+"""
+
+
+def run_once():
+    result = subprocess.run([sys.executable, "-c", PROBE, os.path.join(ROOT, "app.py"), *HEAVY_MODULES],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="fail if median first paint is slower")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    first_paint = [r["first_paint"] for r in runs]
+    summary = {
+        "runs": args.runs,
+        "first_paint_median": statistics.median(first_paint),
+        "first_paint_min": min(first_paint),
+        "streamlit_import_median": statistics.median(r["streamlit_import"] for r in runs),
+        "heavy_loaded": sorted({m for r in runs for m in r["heavy_loaded"]}),
+        "exceptions": [e for r in runs for e in r["exception"]],
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "runs": runs}, f, indent=2)
+
+    failed = bool(summary["heavy_loaded"] or summary["exceptions"])
+    if args.max_seconds is not None and summary["first_paint_median"] > args.max_seconds:
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Check the compiled StumpScorer against sklearn and compare their latency.
+
+The equivalence check covers the training data, uniform random inputs over
+the form ranges, and inputs placed exactly on (and just around) every split
+threshold. It exits non-zero on any mismatch.
+
+    python benchmarks/stump_scorer.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import model_store  # noqa: E402
+from dataset import load_frame  # noqa: E402
+from schema import FEATURES, RANGES  # noqa: E402
+from stump_scorer import StumpScorer  # noqa: E402
+
+
+def probe_inputs(scorer, data, rows, rng):
+    known = data[FEATURES].to_numpy(dtype=np.float64)
+    uniform = np.column_stack([rng.uniform(*RANGES[f], rows) for f in FEATURES])
+    edges = []
+    for i in range(len(FEATURES)):
+        t = scorer.thresholds[scorer.offsets[i]:scorer.offsets[i + 1]]
+        for value in np.concatenate((t, np.nextafter(t, np.inf), np.nextafter(t, -np.inf))):
+            row = known[rng.integers(len(known))].copy()
+            row[i] = value
+            edges.append(row)
+    return np.vstack((known, uniform, np.array(edges).reshape(-1, len(FEATURES))))
+
+
+def latency(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="random rows for the equivalence check")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    data = load_frame()
+    model = model_store.load_or_train()["model"]
+    scorer = StumpScorer.from_model(model)
+
+    X = pd.DataFrame(probe_inputs(scorer, data, args.rows, np.random.default_rng(0)), columns=FEATURES)
+    proba_diff = np.abs(scorer.predict_proba(X) - model.predict_proba(X)).max()
+    label_mismatch = int((scorer.predict(X) != model.predict(X)).sum())
+    print(f"{len(X):,} inputs: max |predict_proba diff| = {proba_diff:.2e}, predict mismatches = {label_mismatch}")
+
+    row = data[FEATURES].iloc[0].tolist()
+    batch = X.iloc[:10_000]
+    timings = {
+        "single row": (latency(lambda: model.predict([row]), args.repeat),
+                       latency(lambda: scorer.predict([row]), args.repeat)),
+        "10k rows": (latency(lambda: model.predict_proba(batch), 20),
+                     latency(lambda: scorer.predict_proba(batch), 20)),
+    }
+    for name, (sk, compiled) in timings.items():
+        print(f"{name:12s} sklearn {sk * 1e6:10.1f} us   compiled {compiled * 1e6:10.1f} us   {sk / compiled:6.1f}x")
+
+    sys.exit(0 if proba_diff < 1e-9 and label_mismatch == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
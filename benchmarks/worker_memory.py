@@ -0,0 +1,119 @@
+"""Per-worker memory as more app worker processes load the same dataset and model.
+
+Each worker loads data and the serving model the way the app does
+(``dataset.load_frame`` and ``retrain.load_holder``), touches every row,
+then reports its RSS, its private memory (USS) and its proportional share
+(PSS) from /proc/self/smaps_rollup while all workers are alive. With the
+memory-mapped store and model files, USS should stay roughly flat as
+workers are added; ``--mode copy`` loads private in-memory copies
+(``pd.read_csv`` plus an unmapped model) for comparison. Linux only.
+
+    python benchmarks/worker_memory.py --rows 1000000 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def memory():
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {"rss": fields["Rss"], "pss": fields["Pss"],
+            "uss": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def worker(path, mode, loaded, release, results):
+    try:
+        results.put(load_and_measure(path, mode))
+    except Exception:
+        import traceback
+        results.put({"error": traceback.format_exc()})
+    loaded.release()
+    release.wait()
+
+
+def load_and_measure(path, mode):
+    import warnings
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    import joblib
+    import pandas as pd
+    import dataset
+    import model_store
+    import retrain
+    from model_store import model_path
+    from schema import FEATURES
+
+    baseline = memory()
+    if mode == "copy":
+        data = pd.read_csv(path, encoding="utf-8-sig")
+        model = joblib.load(model_path(model_store.load_or_train(path)["key"]))["model"]
+    else:
+        data = dataset.load_frame(path)
+        model = retrain.load_holder(path).current.model
+    # Touch every page, as the EDA and history pages do
+    checksum = float(data.sum().sum()) + float(model.predict_proba(data[FEATURES].iloc[:1000]).sum())
+    return {**{k: v - baseline[k] for k, v in memory().items()}, "checksum": checksum}
+
+
+def run(path, workers, mode):
+    ctx = multiprocessing.get_context("spawn")
+    loaded, release, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(path, mode, loaded, release, results)) for _ in range(workers)]
+    for p in processes:
+        p.start()
+    for _ in processes:
+        loaded.acquire()
+    # Read everyone's numbers while all workers still hold their mappings
+    samples = [results.get() for _ in processes]
+    release.set()
+    for p in processes:
+        p.join()
+    for sample in samples:
+        if "error" in sample:
+            raise SystemExit(f"worker failed:\n{sample['error']}")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--mode", choices=["mmap", "copy"], default="mmap")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    from hotpaths import synthetic_dataset
+
+    report = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Workers inherit these and keep the store and models out of the repository
+        os.environ["DATA_STORE_DIR"] = os.path.join(workdir, "store")
+        os.environ["MODEL_DIR"] = os.path.join(workdir, "models")
+        path = synthetic_dataset(args.rows, workdir)
+        run(path, 1, args.mode)  # build the store, train and publish the model once
+
+        print(f"{'workers':>8s} {'RSS MB':>9s} {'USS MB':>9s} {'PSS MB':>9s}   (mean added per worker, {args.mode})")
+        for count in args.workers:
+            samples = run(path, count, args.mode)
+            mean = {k: sum(s[k] for s in samples) / len(samples) / 2**20 for k in ("rss", "uss", "pss")}
+            report.append({"workers": count, **mean})
+            print(f"{count:8d} {mean['rss']:9.1f} {mean['uss']:9.1f} {mean['pss']:9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "mode": args.mode, "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""The heart dataset: its content hash and a columnar, memory-mapped copy of heart.csv.
+
+The CSV is converted once into one ``.npy`` file per column with compact
+dtypes. Every process then maps those files read-only, so the pages are
+shared through the OS page cache instead of being parsed and copied per
+process or per session.
+
+Ingested records (the ``labeled_records`` table) are added as new store
+versions: ``<hash>-r<last record id>`` holds the previous version's
+columns with the newer records appended, so building one costs a copy of
+the columns but never re-parses the CSV. ``heart.csv`` alone remains the
+base version, which the model is trained on.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+DATA_PATH = "heart.csv"
+STORE_DIR = os.getenv("DATA_STORE_DIR", "data_store")
+
+DTYPES = {
+    'age': np.int8,
+    'sex': np.int8,
+    'cp': np.int8,
+    'trestbps': np.int16,
+    'chol': np.int16,
+    'fbs': np.int8,
+    'restecg': np.int8,
+    'thalach': np.int16,
+    'exang': np.int8,
+    'oldpeak': np.float32,
+    'slope': np.int8,
+    'ca': np.int8,
+    'thal': np.int8,
+    'target': np.int8,
+}
+
+_hash_memo = {}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def dataset_hash(path=DATA_PATH):
+    # Re-hash only when the file changes on disk
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _hash_memo:
+        _hash_memo[memo_key] = file_hash(path)
+    return _hash_memo[memo_key]
+
+
+# -------------------- Columnar store --------------------
+def store_path(path=DATA_PATH):
+    return os.path.join(STORE_DIR, dataset_hash(path)[:16])
+
+
+def build_store(path=DATA_PATH):
+    """Convert the CSV into per-column .npy files; a no-op if they already exist."""
+    import pandas as pd
+    from schema import COLUMNS, normalize_columns
+
+    target = store_path(path)
+    if os.path.exists(os.path.join(target, "manifest.json")):
+        return target
+
+    frame = normalize_columns(pd.read_csv(path, encoding="utf-8-sig"))
+    os.makedirs(STORE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=STORE_DIR, prefix=".build-")
+    try:
+        for col in COLUMNS:
+            np.save(os.path.join(staging, f"{col}.npy"), frame[col].to_numpy().astype(DTYPES[col]))
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"source": os.path.basename(path), "sha256": dataset_hash(path),
+                       "rows": len(frame), "columns": COLUMNS}, f)
+        os.chmod(staging, 0o755)
+        # Renaming the finished directory into place is atomic; if another
+        # process won the race, keep theirs.
+        os.rename(staging, target)
+    except OSError:
+        if not os.path.exists(os.path.join(target, "manifest.json")):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+# -------------------- Versions with ingested records --------------------
+# Versions older than the newest few are deleted; processes still mapping them keep their pages
+KEEP_VERSIONS = 2
+
+
+def _versions(path):
+    """{last record id: store directory} of the finished versions built on this CSV."""
+    base = store_path(path)
+    found = {}
+    for directory in glob.glob(f"{glob.escape(base)}-r*"):
+        match = re.search(r"-r(\d+)$", directory)
+        if match and os.path.exists(os.path.join(directory, "manifest.json")):
+            found[int(match.group(1))] = directory
+    return found
+
+
+def current_version(path=DATA_PATH):
+    """Store directory name of heart.csv plus every ingested record, building it if needed."""
+    import db
+    return os.path.basename(build_version(path, db.last_labeled_record_id()))
+
+
+def build_version(path=DATA_PATH, last_record_id=0):
+    """The store with records up to ``last_record_id`` appended to the newest older version."""
+    import db
+
+    base = build_store(path)
+    if not last_record_id:
+        return base
+    target = f"{base}-r{last_record_id}"
+    if os.path.exists(os.path.join(target, "manifest.json")):
+        return target
+
+    older = {rid: d for rid, d in _versions(path).items() if rid < last_record_id}
+    parent_id = max(older, default=0)
+    parent = older.get(parent_id, base)
+    with open(os.path.join(parent, "manifest.json")) as f:
+        manifest = json.load(f)
+    added = db.count_labeled_records(parent_id, last_record_id)
+    rows = manifest["rows"]
+
+    staging = tempfile.mkdtemp(dir=STORE_DIR, prefix=".build-")
+    try:
+        columns = manifest["columns"]
+        outputs = {}
+        for col in columns:
+            previous = np.load(os.path.join(parent, f"{col}.npy"), mmap_mode="r")
+            out = np.lib.format.open_memmap(os.path.join(staging, f"{col}.npy"), mode="w+",
+                                            dtype=DTYPES[col], shape=(rows + added,))
+            out[:rows] = previous
+            outputs[col] = out
+        # Records are streamed from SQLite in batches straight into the new files
+        position = rows
+        for batch in db.iter_labeled_records(parent_id, last_record_id):
+            values = np.array(batch, dtype=np.float64)[:, 1:]
+            for i, col in enumerate(columns):
+                outputs[col][position:position + len(batch)] = values[:, i]
+            position += len(batch)
+        for out in outputs.values():
+            out.flush()
+        del outputs
+
+        manifest.update(rows=rows + added, parent=os.path.basename(parent), last_record_id=last_record_id)
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        os.chmod(staging, 0o755)
+        os.rename(staging, target)
+    except OSError:
+        if not os.path.exists(os.path.join(target, "manifest.json")):
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for rid in sorted(_versions(path))[:-KEEP_VERSIONS]:
+        shutil.rmtree(f"{base}-r{rid}", ignore_errors=True)
+    return target
+
+
+def version_path(version):
+    return os.path.join(STORE_DIR, version)
+
+
+def load_columns(path=DATA_PATH, version=None):
+    """Map every column read-only; returns ``{name: np.memmap}`` in column order.
+
+    Without ``version`` this is heart.csv alone; pass ``current_version()``
+    to include ingested records.
+    """
+    store = version_path(version) if version else build_store(path)
+    with open(os.path.join(store, "manifest.json")) as f:
+        manifest = json.load(f)
+    return {col: np.load(os.path.join(store, f"{col}.npy"), mmap_mode="r") for col in manifest["columns"]}
+
+
+def load_frame(path=DATA_PATH, version=None):
+    """A DataFrame whose columns are views onto the memory-mapped files (no copy)."""
+    import pandas as pd
+    return pd.DataFrame(load_columns(path, version), copy=False)
+
+
+if __name__ == "__main__":
+    location = build_store()
+    columns = load_columns()
+    size = sum(column.nbytes for column in columns.values())
+    print(f"{len(next(iter(columns.values())))} rows, {size:,} bytes in {location}")
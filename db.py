@@ -0,0 +1,275 @@
+"""Data access for users.db: pooled tuned connections, schema set up once per process.
+
+Request code borrows a connection from a small per-database pool with
+``connection()``; Streamlit runs every rerun on a fresh thread, so
+per-thread connections would be reopened (and re-tuned) on every rerun.
+Long-lived worker threads keep their own with ``get_connection()``.
+"""
+
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import metrics
+
+DB_PATH = os.getenv("USERS_DB", "users.db")
+# Idle connections kept per database; borrowers beyond this open extra ones that are closed on return
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE,
+            password TEXT,
+            email TEXT UNIQUE)''',
+    '''CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user TEXT,
+            feedback TEXT,
+            rating INTEGER,
+            category TEXT,
+            created_at REAL)''',
+    # Running per-category rating aggregates, updated in the same transaction as the inserts
+    '''CREATE TABLE IF NOT EXISTS feedback_stats (
+            category TEXT PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            rating_sum INTEGER NOT NULL DEFAULT 0,
+            rated_1 INTEGER NOT NULL DEFAULT 0,
+            rated_2 INTEGER NOT NULL DEFAULT 0,
+            rated_3 INTEGER NOT NULL DEFAULT 0,
+            rated_4 INTEGER NOT NULL DEFAULT 0,
+            rated_5 INTEGER NOT NULL DEFAULT 0)''',
+    '''CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender TEXT,
+            recipient TEXT,
+            message TEXT,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at REAL,
+            claimed_at REAL,
+            created_at REAL,
+            sent_at REAL,
+            last_error TEXT)''',
+    '''CREATE INDEX IF NOT EXISTS idx_outbox_due ON email_outbox (status, next_attempt_at)''',
+    # Newly labeled patient records, on top of heart.csv, used for retraining
+    '''CREATE TABLE IF NOT EXISTS labeled_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            row_hash TEXT UNIQUE,
+            age REAL, sex REAL, cp REAL, trestbps REAL, chol REAL, fbs REAL, restecg REAL,
+            thalach REAL, exang REAL, oldpeak REAL, slope REAL, ca REAL, thal REAL, target REAL,
+            created_at REAL)''',
+    # Resumable login sessions, keyed by a hash of the token's random id (see sessions.py)
+    '''CREATE TABLE IF NOT EXISTS sessions (
+            id_hash TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            created_at REAL)''',
+    '''CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)''',
+)
+
+# Columns added after a table was first shipped: (table, column, type)
+MIGRATIONS = (
+    ("feedback", "rating", "INTEGER"),
+    ("feedback", "category", "TEXT"),
+    ("feedback", "created_at", "REAL"),
+)
+
+# users.username and users.email are UNIQUE, so SQLite already keeps an index on each
+# and the login lookup below is a single index probe.
+FIND_USER = "SELECT id, username, email FROM users WHERE username = ? AND password = ?"
+INSERT_USER = "INSERT INTO users (username, password, email) VALUES (?, ?, ?)"
+INSERT_FEEDBACK = "INSERT INTO feedback (user, feedback, rating, category, created_at) VALUES (?, ?, ?, ?, ?)"
+UPSERT_FEEDBACK_STATS = '''INSERT INTO feedback_stats (category, count, rating_sum, rated_1, rated_2, rated_3, rated_4, rated_5)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                           ON CONFLICT (category) DO UPDATE SET
+                               count = count + excluded.count,
+                               rating_sum = rating_sum + excluded.rating_sum,
+                               rated_1 = rated_1 + excluded.rated_1,
+                               rated_2 = rated_2 + excluded.rated_2,
+                               rated_3 = rated_3 + excluded.rated_3,
+                               rated_4 = rated_4 + excluded.rated_4,
+                               rated_5 = rated_5 + excluded.rated_5'''
+INSERT_LABELED_RECORD = '''INSERT OR IGNORE INTO labeled_records
+                           (row_hash, age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal, target, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+LABELED_RECORDS_RANGE = '''SELECT id, age, sex, cp, trestbps, chol, fbs, restecg, thalach, exang, oldpeak, slope, ca, thal, target
+                           FROM labeled_records WHERE id > ? AND id <= ? ORDER BY id'''
+COUNT_LABELED_RECORDS = "SELECT COUNT(*) FROM labeled_records WHERE id > ? AND id <= ?"
+LAST_LABELED_RECORD = "SELECT COALESCE(MAX(id), 0) FROM labeled_records"
+INSERT_SESSION = "INSERT INTO sessions (id_hash, username, expires_at, created_at) VALUES (?, ?, ?, ?)"
+FIND_SESSION = "SELECT username, expires_at FROM sessions WHERE id_hash = ? AND expires_at > ?"
+DELETE_SESSION = "DELETE FROM sessions WHERE id_hash = ?"
+PURGE_SESSIONS = "DELETE FROM sessions WHERE expires_at <= ?"
+FEEDBACK_STATS = "SELECT category, count, rating_sum, rated_1, rated_2, rated_3, rated_4, rated_5 FROM feedback_stats ORDER BY category"
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_initialized = set()
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def connect(path=None, check_same_thread=True):
+    """Open a new tuned connection. Most callers want connection() instead."""
+    conn = sqlite3.connect(path or DB_PATH, timeout=5.0, check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@contextlib.contextmanager
+def connection(path=None, schema=True, conn=None):
+    """Borrow a pooled connection for the ``with`` block; an explicit ``conn`` is used as is.
+
+    Pass schema=False for side databases that manage their own tables.
+    """
+    if conn is not None:
+        yield conn
+        return
+    path = path or DB_PATH
+    if schema:
+        init_schema(path)
+    with _pools_lock:
+        pool = _pools.setdefault(path, queue.LifoQueue(maxsize=POOL_SIZE))
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        # Pooled connections move between threads, but only one borrower uses each at a time
+        conn = connect(path, check_same_thread=False)
+    try:
+        yield conn
+    finally:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            pool.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
+
+def get_connection(path=None, schema=True):
+    """This thread's own connection, for long-lived worker threads."""
+    # The statement cache on each one reuses prepared queries
+    path = path or DB_PATH
+    if schema:
+        init_schema(path)
+    conns = _local.__dict__.setdefault("conns", {})
+    conn = conns.get(path)
+    if conn is None:
+        conn = conns[path] = connect(path)
+    return conn
+
+
+def init_schema(path=None):
+    path = path or DB_PATH
+    if path in _initialized:
+        return
+    with _schema_lock:
+        if path in _initialized:
+            return
+        conn = connect(path)
+        try:
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                for table, column, column_type in MIGRATIONS:
+                    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        finally:
+            conn.close()
+        _initialized.add(path)
+
+
+# -------------------- Queries --------------------
+@metrics.timed("db.find_user")
+def find_user(username, password):
+    with connection() as conn:
+        return conn.execute(FIND_USER, (username, password)).fetchone()
+
+
+@metrics.timed("db.create_user")
+def create_user(username, password, email):
+    """Raises sqlite3.IntegrityError if the username or email is taken."""
+    with connection() as conn, conn:
+        conn.execute(INSERT_USER, (username, password, email))
+
+
+@metrics.timed("db.save_feedback")
+def save_feedback(rows, conn=None):
+    """Insert (user, feedback, rating, category, created_at) rows and fold them into feedback_stats."""
+    stats = {}
+    for _, _, rating, category, _ in rows:
+        entry = stats.setdefault(category, [category, 0, 0, 0, 0, 0, 0, 0])
+        entry[1] += 1
+        entry[2] += rating
+        entry[2 + rating] += 1
+
+    with connection(conn=conn) as conn, conn:
+        conn.executemany(INSERT_FEEDBACK, rows)
+        conn.executemany(UPSERT_FEEDBACK_STATS, list(stats.values()))
+
+
+@metrics.timed("db.feedback_stats")
+def feedback_stats(conn=None):
+    with connection(conn=conn) as conn:
+        return conn.execute(FEEDBACK_STATS).fetchall()
+
+
+@metrics.timed("db.add_labeled_records")
+def add_labeled_records(rows, conn=None):
+    """Insert (row_hash, 14 column values..., created_at) rows, skipping duplicates; returns rows added."""
+    with connection(conn=conn) as conn, conn:
+        before = conn.total_changes
+        conn.executemany(INSERT_LABELED_RECORD, rows)
+        return conn.total_changes - before
+
+
+def last_labeled_record_id(conn=None):
+    with connection(conn=conn) as conn:
+        return conn.execute(LAST_LABELED_RECORD).fetchone()[0]
+
+
+def count_labeled_records(after, until, conn=None):
+    with connection(conn=conn) as conn:
+        return conn.execute(COUNT_LABELED_RECORDS, (after, until)).fetchone()[0]
+
+
+def iter_labeled_records(after, until, batch_size=50_000, conn=None):
+    """Yield lists of (id, 14 column values) rows with ``after < id <= until``, in id order."""
+    with connection(conn=conn) as conn:
+        cur = conn.execute(LABELED_RECORDS_RANGE, (after, until))
+        while rows := cur.fetchmany(batch_size):
+            yield rows
+
+
+@metrics.timed("db.create_session")
+def create_session(id_hash, username, expires_at, conn=None):
+    now = time.time()
+    with connection(conn=conn) as conn, conn:
+        conn.execute(PURGE_SESSIONS, (now,))
+        conn.execute(INSERT_SESSION, (id_hash, username, expires_at, now))
+
+
+@metrics.timed("db.find_session")
+def find_session(id_hash, conn=None):
+    """(username, expires_at) of a live session, or None."""
+    with connection(conn=conn) as conn:
+        return conn.execute(FIND_SESSION, (id_hash, time.time())).fetchone()
+
+
+def delete_session(id_hash, conn=None):
+    with connection(conn=conn) as conn, conn:
+        conn.execute(DELETE_SESSION, (id_hash,))
@@ -0,0 +1,236 @@
+"""Size-bounded on-disk cache of rendered EDA charts, keyed by dataset version.
+
+Keys also carry ``RENDER_VERSION``, a hash of this module's source, so
+editing a renderer never serves charts drawn by the old code. New dataset
+versions are rendered ahead of the first visit by ``warm_version``, which
+ingest calls after adding records.
+
+Renderers take the dataset and its ``eda_stats.RunningStats``. Charts are
+built from pre-binned counts, and the one scatter view samples at most
+``SCATTER_MAX_POINTS`` rows, so chart payloads stay bounded however many
+rows the dataset has.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import numpy as np
+
+import metrics
+from fsutil import atomic_write
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("EDA_CACHE_DIR", os.path.join(".cache", "eda"))
+MAX_BYTES = int(os.getenv("EDA_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+SCATTER_MAX_POINTS = 5_000
+
+with open(__file__, "rb") as _source:
+    RENDER_VERSION = hashlib.sha256(_source.read()).hexdigest()[:8]
+
+# pyplot and seaborn keep global figure state, so renders never overlap
+_render_lock = threading.Lock()
+_prewarming = {}  # dataset key -> prewarm thread
+
+
+# -------------------- Renderers --------------------
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    return buf.getvalue()
+
+
+def render_heatmap(data, stats):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    try:
+        sns.heatmap(stats.corr(), annot=True, cmap="YlGnBu", linewidths=0.5, fmt=".2f", annot_kws={"size": 8}, ax=ax)
+        return _png(fig)
+    finally:
+        plt.close(fig)
+
+
+def _centers(edges):
+    return np.round((edges[:-1] + edges[1:]) / 2, 4)
+
+
+def render_pair_density(data, stats):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from eda_stats import PAIR_COLUMNS
+
+    cols = PAIR_COLUMNS
+    fig = make_subplots(rows=len(cols), cols=len(cols), horizontal_spacing=0.02, vertical_spacing=0.02)
+    for i, row_col in enumerate(cols):
+        for j, col in enumerate(cols[:i + 1]):
+            if i == j:
+                # Diagonal: the column's histogram, stacked by target
+                for target, color in ((0, '#636efa'), (1, '#ef553b')):
+                    fig.add_trace(go.Bar(x=_centers(stats.edges[col]), y=stats.histograms[col][target],
+                                         marker_color=color, name=str(target), legendgroup=str(target),
+                                         showlegend=i == 0), row=i + 1, col=j + 1)
+            else:
+                counts = stats.pairs[col, row_col].sum(axis=0)
+                fig.add_trace(go.Heatmap(x=_centers(stats.edges[col]), y=_centers(stats.edges[row_col]),
+                                         z=counts.T, colorscale='YlGnBu', showscale=False,
+                                         hovertemplate=f'{col}=%{{x}}<br>{row_col}=%{{y}}<br>rows=%{{z}}<extra></extra>'),
+                              row=i + 1, col=j + 1)
+            if i == len(cols) - 1:
+                fig.update_xaxes(title_text=col, row=i + 1, col=j + 1)
+            if j == 0:
+                fig.update_yaxes(title_text=row_col, row=i + 1, col=j + 1)
+    fig.update_layout(barmode='stack', bargap=0, height=900, legend_title_text='target')
+    return fig.to_json().encode()
+
+
+def render_age_thalach_scatter(data, stats):
+    import plotly.graph_objects as go
+
+    rows = len(data)
+    shown = min(rows, SCATTER_MAX_POINTS)
+    # A fixed seed keeps the sample (and the cached chart) stable for a dataset version
+    idx = np.sort(np.random.default_rng(0).choice(rows, shown, replace=False)) if rows > shown else np.arange(rows)
+    age, thalach, target = (data[col].to_numpy()[idx] for col in ('age', 'thalach', 'target'))
+    fig = go.Figure([go.Scattergl(x=age[target == t], y=thalach[target == t], mode='markers', name=str(t),
+                                  marker={'size': 5, 'opacity': 0.6})
+                     for t in (0, 1)])
+    title = 'Age vs Maximum Heart Rate'
+    if shown < rows:
+        title += f' ({shown:,} of {rows:,} patients sampled)'
+    fig.update_layout(title=title, xaxis_title='age', yaxis_title='thalach', legend_title_text='target')
+    return fig.to_json().encode()
+
+
+def render_age_histogram(data, stats):
+    import plotly.graph_objects as go
+
+    edges, counts = stats.edges['age'], stats.histograms['age']
+    # Drop the empty bins at either end of the fixed 20-100 range
+    occupied = np.flatnonzero(counts.sum(axis=0))
+    first, last = (occupied[0], occupied[-1] + 1) if len(occupied) else (0, len(edges) - 1)
+    fig = go.Figure([go.Bar(x=(edges[first:last] + edges[first + 1:last + 1]) / 2, y=counts[target, first:last],
+                            width=np.diff(edges[first:last + 1]), name=str(target))
+                     for target in (0, 1)])
+    fig.update_layout(barmode='stack', bargap=0, title='Age Distribution by Heart Disease Status',
+                      xaxis_title='age', yaxis_title='count', legend_title_text='target')
+    return fig.to_json().encode()
+
+
+def render_cp_bar(data, stats):
+    import plotly.express as px
+
+    cp_counts = stats.counts('cp')
+    fig = px.bar(x=list(cp_counts), y=list(cp_counts.values()), color=list(cp_counts),
+                 labels={'x': 'Chest Pain Type', 'y': 'Count', 'color': 'Chest Pain Type'})
+    return fig.to_json().encode()
+
+
+def render_gender_pie(data, stats):
+    import plotly.express as px
+
+    gender_counts = stats.counts('sex')
+    fig = px.pie(values=list(gender_counts.values()), names=[{1: 'Male', 0: 'Female'}[v] for v in gender_counts],
+                 title='Gender Distribution')
+    return fig.to_json().encode()
+
+
+ARTIFACTS = {
+    "heatmap.png": render_heatmap,
+    "pair_density.json": render_pair_density,
+    "age_thalach_scatter.json": render_age_thalach_scatter,
+    "age_histogram.json": render_age_histogram,
+    "cp_bar.json": render_cp_bar,
+    "gender_pie.json": render_gender_pie,
+}
+
+
+# -------------------- Cache --------------------
+def _path(dataset_key, name):
+    return os.path.join(CACHE_DIR, f"{dataset_key}-{RENDER_VERSION}-{name}")
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    # mtime doubles as the LRU clock; atime is often disabled on mounts
+    os.utime(path)
+    return content
+
+
+def _write(path, content):
+    with atomic_write(path) as f:
+        f.write(content)
+
+
+def evict(max_bytes=MAX_BYTES):
+    try:
+        entries = [e for e in os.scandir(CACHE_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime)
+    total = sum(e.stat().st_size for e in entries)
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        total -= entry.stat().st_size
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def get(name, dataset_key, data, stats):
+    """Return the cached artifact bytes, rendering and storing them on a miss."""
+    path = _path(dataset_key, name)
+    content = _read(path)
+    if content is None:
+        with _render_lock:
+            content = _read(path)
+            if content is None:
+                with metrics.span(f"eda.render.{name}"):
+                    content = ARTIFACTS[name](data, stats)
+                _write(path, content)
+                evict()
+    return content
+
+
+def prewarm(data, dataset_key, stats):
+    """Render any missing artifacts for this dataset version on a background thread; returns the thread."""
+    if dataset_key in _prewarming:
+        return _prewarming[dataset_key]
+
+    def run():
+        for name in ARTIFACTS:
+            try:
+                get(name, dataset_key, data, stats)
+            except Exception:
+                log.exception("Pre-warming %s failed", name)
+
+    thread = _prewarming[dataset_key] = threading.Thread(target=run, name="eda-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def warm_version(version=None):
+    """Prewarm the charts of a dataset version (default: the current one); returns the thread."""
+    import dataset
+    import eda_stats
+
+    key = version or dataset.current_version()
+    return prewarm(dataset.load_frame(version=key), key, eda_stats.for_dataset(version=key))
+
+
+if __name__ == "__main__":
+    import matplotlib
+
+    matplotlib.use("Agg")
+    warm_version().join()
+    print(f"EDA cache warmed in {CACHE_DIR}")
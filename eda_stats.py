@@ -0,0 +1,176 @@
+"""Incrementally maintained summary statistics of the heart dataset for the EDA page.
+
+``RunningStats`` keeps the row count, per-column means and the co-moment
+matrix (merged chunk by chunk with the parallel form of Welford's update),
+plus fixed-bin histograms split by target and 2-D histograms for each
+pair of continuous columns (the density grid on the EDA page). Adding records folds them into
+the existing summary; nothing is rescanned. Summaries are persisted next to
+the dataset's columnar store, so each dataset version is scanned once.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from dataset import DATA_PATH, build_store, load_columns, version_path
+from fsutil import atomic_write
+from schema import COLUMNS, RANGES, TARGET
+
+CHUNK_ROWS = 65_536
+
+# Bin width per column; integer-coded categoricals get one bin per value
+BIN_WIDTHS = {'age': 2, 'trestbps': 5, 'chol': 10, 'thalach': 5, 'oldpeak': 0.2}
+PAIR_COLUMNS = list(BIN_WIDTHS)
+
+
+def bin_edges(col):
+    low, high = RANGES[col]
+    width = BIN_WIDTHS.get(col, 1)
+    if col not in BIN_WIDTHS:
+        # Centre each integer value in its own bin
+        return np.arange(low - 0.5, high + 1, 1.0)
+    count = int(np.ceil(round((high - low) / width, 6)))
+    return low + width * np.arange(count + 1)
+
+
+class RunningStats:
+    def __init__(self, columns=COLUMNS):
+        self.columns = list(columns)
+        self.n = 0
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros((len(self.columns), len(self.columns)))
+        self.edges = {col: bin_edges(col) for col in self.columns if col != TARGET}
+        # histograms[col][t] counts rows with target t in each bin of col
+        self.histograms = {col: np.zeros((2, len(e) - 1), dtype=np.int64) for col, e in self.edges.items()}
+        # pairs[(a, b)][t] is the 2-D histogram of a against b for rows with target t
+        paired = [col for col in PAIR_COLUMNS if col in self.edges]
+        self.pairs = {(a, b): np.zeros((2, len(self.edges[a]) - 1, len(self.edges[b]) - 1), dtype=np.int64)
+                      for i, a in enumerate(paired) for b in paired[i + 1:]}
+        self._target = self.columns.index(TARGET)
+
+    def update(self, values):
+        """Fold in a batch of records (a DataFrame or an array in ``self.columns`` order)."""
+        if hasattr(values, "columns"):
+            values = values[self.columns].to_numpy(dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.columns))
+        count = len(values)
+        if not count:
+            return self
+
+        mean = values.mean(axis=0)
+        centered = values - mean
+        self._merge(count, mean, centered.T @ centered)
+
+        target = values[:, self._target].astype(np.int64)
+        bins = {}
+        for i, col in enumerate(self.columns):
+            if col == TARGET:
+                continue
+            edges = self.edges[col]
+            # Out-of-range values land in the edge bins
+            bins[col] = np.clip(np.searchsorted(edges, values[:, i], side="right") - 1, 0, len(edges) - 2)
+            self.histograms[col] += _bincount((target, bins[col]), self.histograms[col].shape)
+        for (a, b), counts in self.pairs.items():
+            counts += _bincount((target, bins[a], bins[b]), counts.shape)
+        return self
+
+    def merge(self, other):
+        """Combine with stats gathered elsewhere (another worker, another segment)."""
+        self._merge(other.n, other.mean, other.m2)
+        for col, counts in other.histograms.items():
+            self.histograms[col] += counts
+        for pair, counts in other.pairs.items():
+            self.pairs[pair] += counts
+        return self
+
+    def _merge(self, count, mean, m2):
+        total = self.n + count
+        if not total:
+            return
+        delta = mean - self.mean
+        self.m2 = self.m2 + m2 + np.outer(delta, delta) * (self.n * count / total)
+        self.mean = self.mean + delta * (count / total)
+        self.n = total
+
+    # ---- Summaries ----
+    def cov(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else np.full_like(self.m2, np.nan)
+
+    def corr(self):
+        """Pearson correlation matrix as a DataFrame, like ``data.corr()``."""
+        import pandas as pd
+        std = np.sqrt(np.diag(self.m2))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.m2 / np.outer(std, std)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def positives(self):
+        # Every histogram splits all rows by target, so any one gives the count
+        return int(next(iter(self.histograms.values()))[1].sum())
+
+    def counts(self, col):
+        """Rows per value of an integer-coded column, as ``{value: count}``."""
+        edges = self.edges[col]
+        totals = self.histograms[col].sum(axis=0)
+        return {int(edge + 0.5): int(c) for edge, c in zip(edges[:-1], totals) if c}
+
+    # ---- Persistence ----
+    def save(self, path):
+        with atomic_write(path) as f:
+            np.savez(f, n=self.n, mean=self.mean, m2=self.m2,
+                     **{f"hist_{col}": counts for col, counts in self.histograms.items()},
+                     **{f"pair_{a}_{b}": counts for (a, b), counts in self.pairs.items()})
+
+    @classmethod
+    def load(cls, path, columns=COLUMNS):
+        stats = cls(columns)
+        with np.load(path) as saved:
+            stats.n = int(saved["n"])
+            stats.mean = saved["mean"]
+            stats.m2 = saved["m2"]
+            for col in stats.histograms:
+                stats.histograms[col] = saved[f"hist_{col}"]
+            for a, b in stats.pairs:
+                stats.pairs[a, b] = saved[f"pair_{a}_{b}"]
+        return stats
+
+
+def _bincount(indices, shape):
+    # One bincount over the flattened cell index is much faster than np.add.at
+    flat = np.ravel_multi_index(indices, shape)
+    return np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+
+def scan(columns, stats=None):
+    """Stats over ``{name: array}`` columns, read in chunks so memory stays flat."""
+    stats = stats or RunningStats()
+    rows = len(columns[stats.columns[0]])
+    for start in range(0, rows, CHUNK_ROWS):
+        stats.update(np.column_stack([columns[col][start:start + CHUNK_ROWS] for col in stats.columns]))
+    return stats
+
+
+def for_dataset(path=DATA_PATH, version=None):
+    """The dataset's stats, computed on the first call for each version and loaded afterwards.
+
+    A version with ingested records starts from its parent version's stats
+    and folds in only the appended rows.
+    """
+    store = version_path(version) if version else build_store(path)
+    stats_path = os.path.join(store, "stats.npz")
+    try:
+        return RunningStats.load(stats_path)
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    with open(os.path.join(store, "manifest.json")) as f:
+        parent = json.load(f).get("parent")
+    columns = load_columns(path, version)
+    # The parent may already have been pruned, in which case this version is scanned in full
+    if parent and os.path.exists(os.path.join(version_path(parent), "manifest.json")):
+        stats = for_dataset(path, parent)
+        scan({col: values[stats.n:] for col, values in columns.items()}, stats)
+    else:
+        stats = scan(columns)
+    stats.save(stats_path)
+    return stats
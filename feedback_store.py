@@ -0,0 +1,88 @@
+"""Write-behind buffer for feedback: submissions return at once and are flushed in batched transactions."""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+import db
+
+log = logging.getLogger(__name__)
+
+
+class FeedbackWriter(threading.Thread):
+    def __init__(self, db_path=None, batch_size=100, flush_interval=2.0):
+        super().__init__(name="feedback-writer", daemon=True)
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self.flushed = 0
+        self.batches = 0
+        atexit.register(self.stop)
+
+    def submit(self, user, feedback, rating, category):
+        if not 1 <= rating <= 5:
+            raise ValueError("rating must be between 1 and 5")
+        self._queue.put((user, feedback, int(rating), category, time.time()))
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        if self.is_alive():
+            self.join(timeout)
+        else:
+            self._drain()
+
+    def run(self):
+        while not self._stopping.is_set():
+            self.flush(wait=self.flush_interval)
+        self._drain()
+
+    def _drain(self):
+        while self.flush():
+            pass
+
+    def flush(self, wait=0.0):
+        """Write everything buffered so far in one transaction, waiting up to ``wait`` for the first row."""
+        rows = []
+        try:
+            rows.append(self._queue.get(timeout=wait) if wait else self._queue.get_nowait())
+            # Give a burst of submissions a moment to land in the same batch
+            deadline = time.monotonic() + (self.flush_interval if wait else 0)
+            while len(rows) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                rows.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not rows:
+            return 0
+
+        try:
+            db.save_feedback(rows, db.get_connection(self.db_path))
+        except Exception:
+            log.exception("Saving %d feedback rows failed; re-queueing", len(rows))
+            for row in rows:
+                self._queue.put(row)
+            self._stopping.wait(self.flush_interval)
+            return 0
+        self.flushed += len(rows)
+        self.batches += 1
+        return len(rows)
+
+
+def summary(db_path=None):
+    """Per-category count, mean rating and 1-5 histogram, read from the materialized stats."""
+    with db.connection(db_path) as conn:
+        rows = db.feedback_stats(conn)
+    return [{
+        "category": category,
+        "count": count,
+        "mean": rating_sum / count if count else None,
+        "histogram": list(histogram),
+    } for category, count, rating_sum, *histogram in rows]
@@ -0,0 +1,27 @@
+"""Crash- and race-safe file replacement shared by the stores and caches."""
+
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="wb"):
+    """Yield a temporary file next to ``path`` that replaces it when the block completes.
+
+    Every writer gets its own ``mkstemp`` file, so concurrent processes never
+    write to or rename each other's staging file, and readers only ever see
+    a complete old or new ``path``. On error the temporary file is removed.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; other processes read these files
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,131 @@
+"""Precomputed indexes behind the Medical History filters, search and pagination.
+
+Rows are kept in age order: an age range is two binary searches, each target
+value has a bitmap laid out in that order with a prefix count, and free-text
+search goes through an inverted index of ``column:value`` tokens. Only the
+rows on the requested page are ever materialized.
+"""
+
+import re
+
+import numpy as np
+
+_TERM = re.compile(r"^([a-z_]+)\s*[:=]\s*(-?\d+(?:\.\d+)?)$")
+
+
+class QueryResult:
+    def __init__(self, count, page_fn):
+        self.count = count
+        self._page_fn = page_fn
+
+    def pages(self, page_size):
+        return max(1, -(-self.count // page_size))
+
+    def page(self, number, page_size):
+        """Row positions (into the original frame) for 1-based page ``number``."""
+        start = (number - 1) * page_size
+        stop = min(start + page_size, self.count)
+        if start >= stop:
+            return np.empty(0, dtype=np.int64)
+        return self._page_fn(start, stop)
+
+    def chunks(self, size):
+        """Row positions of every match, ``size`` at a time, in page order."""
+        for start in range(0, self.count, size):
+            yield self._page_fn(start, min(start + size, self.count))
+
+
+class RecordIndex:
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        self.size = len(frame)
+
+        age = frame['age'].to_numpy()
+        self.order = np.argsort(age, kind='stable')
+        self.sorted_age = age[self.order]
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(self.size)
+
+        # Per-target bitmaps in age order, with running counts for O(1) range counts
+        target_sorted = frame['target'].to_numpy()[self.order]
+        self.bitmaps = {}
+        self.prefix = {}
+        for value in np.unique(target_sorted):
+            bitmap = target_sorted == value
+            self.bitmaps[int(value)] = bitmap
+            self.prefix[int(value)] = np.concatenate(([0], np.cumsum(bitmap)))
+
+        # Inverted index: (column, value) -> sorted row positions
+        self.postings = {}
+        for col in self.columns:
+            values = frame[col].to_numpy()
+            uniques, inverse = np.unique(values, return_inverse=True)
+            grouped = np.argsort(inverse, kind='stable')
+            bounds = np.searchsorted(inverse[grouped], np.arange(len(uniques) + 1))
+            for i, value in enumerate(uniques):
+                self.postings[(col, _key(value))] = grouped[bounds[i]:bounds[i + 1]]
+
+    @property
+    def age_min(self):
+        return int(self.sorted_age[0]) if self.size else 0
+
+    @property
+    def age_max(self):
+        return int(self.sorted_age[-1]) if self.size else 0
+
+    def age_bounds(self, low, high):
+        return (np.searchsorted(self.sorted_age, low, side='left'),
+                np.searchsorted(self.sorted_age, high, side='right'))
+
+    def search(self, text):
+        """Row positions matching every term; terms are ``col:value`` or a bare value in any column."""
+        result = None
+        for term in text.lower().split():
+            match = _TERM.match(term)
+            if match:
+                try:
+                    value = _key(match.group(2))
+                except ValueError:
+                    return np.empty(0, dtype=np.int64)
+                rows = self.postings.get((match.group(1), value), np.empty(0, dtype=np.int64))
+            else:
+                try:
+                    value = _key(term)
+                except ValueError:
+                    return np.empty(0, dtype=np.int64)
+                hits = [self.postings[(col, value)] for col in self.columns if (col, value) in self.postings]
+                rows = np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return result
+
+    def query(self, age_range=None, target=None, search=""):
+        low, high = age_range if age_range else (self.age_min, self.age_max)
+        lo, hi = self.age_bounds(low, high)
+
+        if search.strip():
+            rows = self.search(search)
+            rows = rows[(self.rank[rows] >= lo) & (self.rank[rows] < hi)]
+            if target is not None:
+                rows = rows[self.bitmaps.get(target, np.zeros(self.size, bool))[self.rank[rows]]]
+            rows = rows[np.argsort(self.rank[rows])]
+            return QueryResult(len(rows), lambda start, stop: rows[start:stop])
+
+        if target is None:
+            return QueryResult(hi - lo, lambda start, stop: self.order[lo + start:lo + stop])
+
+        if target not in self.prefix:
+            return QueryResult(0, None)
+        prefix = self.prefix[target]
+        before = prefix[lo]
+
+        def page(start, stop):
+            # The n-th match after ``lo`` is where the running count first reaches before + n
+            positions = np.searchsorted(prefix, before + np.arange(start, stop) + 1) - 1
+            return self.order[positions]
+
+        return QueryResult(int(prefix[hi] - before), page)
+
+
+def _key(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 4)
@@ -0,0 +1,102 @@
+"""Static content of the Home page, assembled into a few HTML blocks at import.
+
+Each block is sent as a single ``st.markdown`` delta, so a visit costs a
+handful of messages instead of one per tip and risk factor, and the hero
+image is a bundled file (``assets/hero.png``) rather than a remote URL.
+"""
+
+import os
+
+HERO_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "hero.png")
+
+FEATURES = [
+    "🌡️ Real-time prediction using Machine Learning",
+    "📊 Data visualization and analysis",
+    "🏥 Doctor search and booking",
+    "💬 User feedback system",
+    "📱 Interactive health monitoring",
+    "🎯 Personalized health recommendations",
+]
+
+TIPS = [
+    "🏃‍♂️ Exercise for at least 30 minutes daily",
+    "🥗 Eat a balanced diet rich in fruits and vegetables",
+    "💧 Stay hydrated - drink 8 glasses of water daily",
+    "😴 Get 7-8 hours of quality sleep",
+    "🧘‍♂️ Practice stress management techniques",
+    "🚭 Avoid smoking and limit alcohol consumption",
+    "🩺 Regular health check-ups are essential",
+    "🧠 Stay mentally active and socially connected",
+]
+
+RISK_FACTORS = {
+    "High Blood Pressure": "Affects 1 in 3 adults",
+    "High Cholesterol": "Leading cause of heart disease",
+    "Diabetes": "Doubles heart disease risk",
+    "Obesity": "Increases risk by 40%",
+    "Smoking": "Major preventable cause",
+    "Physical Inactivity": "Affects 1 in 4 adults",
+}
+
+WARNING_SIGNS = [
+    "Severe chest pain or pressure",
+    "Shortness of breath",
+    "Pain in arms, back, neck, or jaw",
+    "Cold sweats",
+    "Nausea or lightheadedness",
+]
+
+HEADER = """
+<div style='background: linear-gradient(to right, #ff4b4b, #ff6b6b); padding: 2rem; border-radius: 10px; margin-bottom: 2rem;'>
+    <h1 style='color: white; text-align: center; margin: 0;'>🏥 Cardiovascular Disease Prediction System</h1>
+</div>
+"""
+
+INTRO = f"""
+<div style='background-color: #f8f9fa; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
+    <h3 style='color: #1f1f1f; margin-bottom: 1rem;'>💖 Welcome to the Cardiovascular Disease Prediction System!</h3>
+    <p style='color: #666;'>This application helps you predict the likelihood of heart disease based on several health parameters.</p>
+    <div style='margin-top: 1rem;'>
+        <h4 style='color: #1f1f1f;'>Key Features:</h4>
+        <ul style='list-style-type: none; padding: 0;'>
+            {"".join(f"<li style='margin: 0.5rem 0;'>{feature}</li>" for feature in FEATURES)}
+        </ul>
+    </div>
+</div>
+<h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>📊 Global Heart Disease Statistics</h3>
+"""
+
+# Everything below the statistics: tips, risk factors, warning signs and the disclaimer
+GUIDANCE = f"""
+<div style='background-color: #f8f9fa; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
+    <h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>💡 Daily Health Tips</h3>
+    <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1rem;'>
+        {"".join(f"<div style='background-color: #ffffff; padding: 1rem; border-radius: 5px; "
+                 f"box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>{tip}</div>" for tip in TIPS)}
+    </div>
+</div>
+<div style='background-color: #ffffff; padding: 2rem; border-radius: 10px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'>
+    <h3 style='color: #1f1f1f; margin-bottom: 1.5rem;'>⚠️ Common Risk Factors</h3>
+    <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(250px, 1fr)); gap: 1rem;'>
+        {"".join(f"<div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px;'>"
+                 f"<strong style='color: #1f1f1f;'>{factor}:</strong><br>"
+                 f"<span style='color: #666;'>{stat}</span></div>" for factor, stat in RISK_FACTORS.items())}
+    </div>
+</div>
+<div style='background-color: #fff3cd; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
+    <h3 style='color: #856404; margin-bottom: 1.5rem;'>🚨 Emergency Warning Signs</h3>
+    <div style='color: #856404;'>
+        <p style='margin-bottom: 1rem;'>Seek immediate medical attention if you experience:</p>
+        <ul style='list-style-type: none; padding: 0;'>
+            {"".join(f"<li style='margin: 0.5rem 0;'>• {sign}</li>" for sign in WARNING_SIGNS)}
+        </ul>
+    </div>
+</div>
+<div style='background-color: #cce5ff; padding: 2rem; border-radius: 10px; margin: 2rem 0;'>
+    <h4 style='color: #004085; margin-bottom: 1rem;'>⚠️ Important Disclaimer</h4>
+    <p style='color: #004085; margin: 0;'>
+        This app is for informational purposes only. Always consult with healthcare professionals for medical advice and diagnosis.
+        In case of emergency, call your local emergency services immediately.
+    </p>
+</div>
+"""
@@ -0,0 +1,264 @@
+"""Standalone asyncio HTTP inference service with dynamic micro-batching.
+
+Serves the same model as the app's ``train_model`` (the latest retrained
+model for the dataset, compiled to a StumpScorer where possible), and
+checks every ``reload_seconds`` whether the app's Retrainer has swapped in
+a newer one. Requests
+that arrive close together are coalesced into one vectorized
+``predict_proba`` call: the first waiting request opens a window of
+``max_wait_ms`` and the batch is scored when the window closes or
+``max_batch`` rows are waiting, whichever comes first.
+
+    POST /predict   {"features": {"age": 63, ...}}            one patient
+                    {"instances": [{...}, [63, 1, 3, ...]]}   several (dicts or 13-value lists)
+    GET  /health    model version and batching stats
+
+    python inference_service.py --port 8601 --max-wait-ms 5
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+
+import numpy as np
+
+import metrics
+from schema import FEATURES, RANGES, SchemaError
+
+log = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+LOWS = np.array([RANGES[f][0] for f in FEATURES], dtype=np.float64)
+HIGHS = np.array([RANGES[f][1] for f in FEATURES], dtype=np.float64)
+
+
+def parse_instances(payload):
+    """Turn a request body into an (n, 13) float array, raising SchemaError on bad input."""
+    if not isinstance(payload, dict) or ("features" in payload) == ("instances" in payload):
+        raise SchemaError('Expected an object with either "features" or "instances"')
+    instances = [payload["features"]] if "features" in payload else payload["instances"]
+    if not isinstance(instances, list) or not instances:
+        raise SchemaError('"instances" must be a non-empty list')
+
+    rows = []
+    for i, instance in enumerate(instances):
+        if isinstance(instance, dict):
+            missing = [f for f in FEATURES if f not in instance]
+            if missing:
+                raise SchemaError(f"Instance {i} is missing: {', '.join(missing)}")
+            instance = [instance[f] for f in FEATURES]
+        if not isinstance(instance, list) or len(instance) != len(FEATURES):
+            raise SchemaError(f"Instance {i} must be an object or a list of {len(FEATURES)} values")
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) and math.isfinite(v) for v in instance):
+            raise SchemaError(f"Instance {i} has missing or non-numeric values")
+        rows.append(instance)
+
+    X = np.array(rows, dtype=np.float64)
+    outside = (X < LOWS) | (X > HIGHS)
+    if outside.any():
+        row, col = np.argwhere(outside)[0]
+        low, high = RANGES[FEATURES[col]]
+        raise SchemaError(f"Instance {row}: '{FEATURES[col]}' is outside {low}-{high}")
+    return X
+
+
+class MicroBatcher:
+    """Coalesces concurrent ``predict`` calls into single ``predict_proba`` calls."""
+
+    def __init__(self, holder, max_batch=256, max_wait_ms=5.0):
+        self.holder = holder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._pending = []  # (X, future)
+        self._pending_rows = 0
+        self._full = None
+        self._task = None
+
+    async def predict(self, X):
+        """Probabilities of the positive class for the rows of X, and the model version used."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((X, future))
+        self._pending_rows += len(X)
+        if self._task is None:
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._flush_after_window())
+        if self._pending_rows >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _flush_after_window(self):
+        try:
+            await asyncio.wait_for(self._full.wait(), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        pending, self._pending, self._pending_rows, self._task = self._pending, [], 0, None
+
+        serving = self.holder.current
+        X = np.vstack([x for x, _ in pending])
+        try:
+            # Score off the event loop so new requests keep queueing for the next batch
+            proba = await asyncio.get_running_loop().run_in_executor(None, self._score, serving.model, X)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(X)
+
+        start = 0
+        for x, future in pending:
+            if not future.cancelled():
+                future.set_result((proba[start:start + len(x)], serving.version))
+            start += len(x)
+
+    @staticmethod
+    def _score(model, X):
+        with metrics.span("model.predict_microbatch"):
+            if hasattr(model, "feature_names_in_"):
+                import pandas as pd
+                X = pd.DataFrame(X, columns=model.feature_names_in_)
+            proba = model.predict_proba(X)
+        return proba[:, list(model.classes_).index(1)]
+
+
+class InferenceService:
+    def __init__(self, holder, max_batch=256, max_wait_ms=5.0):
+        self.batcher = MicroBatcher(holder, max_batch, max_wait_ms)
+        self.started = time.time()
+        self.requests = 0
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 with keep-alive; just enough of the protocol for JSON clients and load generators
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError(f"Negative Content-Length {length}")
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Malformed request"}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self.route(method, path.split("?")[0], body)
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if path == "/health" and method == "GET":
+            return 200, self.health()
+        if path != "/predict":
+            return 404, {"error": "Not found"}
+        if method != "POST":
+            return 405, {"error": "Use POST"}
+
+        self.requests += 1
+        try:
+            X = parse_instances(json.loads(body))
+        except (ValueError, UnicodeDecodeError) as e:  # SchemaError is a ValueError, as is bad JSON
+            return 400, {"error": str(e)}
+        except OverflowError:  # integers too large for a float, e.g. 1e400 written out in full
+            return 400, {"error": "Feature values must fit in a float"}
+        try:
+            with metrics.span("service.predict"):
+                proba, version = await self.batcher.predict(X)
+        except Exception:
+            log.exception("Prediction failed")
+            return 500, {"error": "Prediction failed"}
+        return 200, {"model_version": version,
+                     "predictions": [{"prediction": int(p > 0.5), "probability": round(float(p), 4)} for p in proba]}
+
+    def health(self):
+        batcher = self.batcher
+        return {"model_version": batcher.holder.current.version,
+                "accuracy": batcher.holder.current.accuracy,
+                "uptime": round(time.time() - self.started, 1),
+                "requests": self.requests,
+                "batches": batcher.batches,
+                "mean_batch_rows": batcher.rows / batcher.batches if batcher.batches else 0.0}
+
+    @staticmethod
+    async def _respond(writer, status, payload, close=False):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                     .encode() + body)
+        await writer.drain()
+
+
+async def follow_retrains(holder, interval):
+    """Swap in the model the retrain pointer names whenever it changes."""
+    import retrain
+    loop = asyncio.get_running_loop()
+    seen = holder.current.version
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            key = await loop.run_in_executor(None, retrain.serving_key)
+            if key != seen:
+                seen = key
+                latest = await loop.run_in_executor(None, retrain.load_holder)
+                if latest.current.version != holder.current.version:
+                    holder.swap(latest.current)
+                    log.info("Now serving model %s", latest.current.version)
+        except Exception:
+            log.exception("Checking for a retrained model failed")
+
+
+async def serve(host="127.0.0.1", port=8601, max_batch=256, max_wait_ms=5.0, holder=None, reload_seconds=5.0):
+    follow = None
+    if holder is None:
+        import retrain
+        holder = retrain.load_holder()
+        follow = asyncio.create_task(follow_retrains(holder, reload_seconds))
+    service = InferenceService(holder, max_batch, max_wait_ms)
+    server = await asyncio.start_server(service.handle, host, port)
+    log.info("Serving model %s on http://%s:%d (batches up to %d rows, %.1f ms window)",
+             holder.current.version, host, port, max_batch, max_wait_ms)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if follow:
+            follow.cancel()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Serve heart disease predictions over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8601)
+    parser.add_argument("--max-batch", type=int, default=256, help="rows per predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="how long a request waits for company")
+    parser.add_argument("--reload-seconds", type=float, default=5.0, help="how often to look for a retrained model")
+    parser.add_argument("--metrics-port", type=int, help="also export metrics on this port")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        metrics.Exporter(port=args.metrics_port)
+    asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms, reload_seconds=args.reload_seconds))
@@ -0,0 +1,106 @@
+"""Streaming bulk ingestion of labeled records (CSV or JSONL with the 14 dataset columns).
+
+Files are read one chunk at a time, each chunk is validated and hashed, and
+the whole chunk goes into ``labeled_records`` with one ``executemany`` in a
+single transaction; rows already stored (same row hash), including the
+rows of heart.csv itself, are skipped. The EDA and Medical History pages
+pick the new rows up through a new dataset store version (see
+``dataset.current_version``) without re-reading heart.csv, and
+``ingest_file`` starts rendering the EDA charts for that version.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+import dataset
+import db
+import metrics
+from batch import BatchStats, detect_format, iter_chunks
+from schema import COLUMNS, SchemaError, row_hash, validate_frame
+
+CHUNK_SIZE = 50_000
+
+_base_hashes = {}
+
+
+class IngestStats(BatchStats):
+    """BatchStats (rows, chunks, rate) plus how many rows were new."""
+
+    def __init__(self):
+        super().__init__()
+        self.inserted = 0
+
+    @property
+    def duplicates(self):
+        return self.rows - self.inserted
+
+
+def base_hashes(path=dataset.DATA_PATH):
+    """Row hashes of the base dataset, whose rows every store version already contains."""
+    key = dataset.dataset_hash(path)
+    if key not in _base_hashes:
+        values = dataset.load_frame(path)[COLUMNS].to_numpy(dtype=np.float64)
+        _base_hashes[key] = frozenset(row_hash(row) for row in values)
+    return _base_hashes[key]
+
+
+def insert_frame(frame, conn=None):
+    """Validate one frame of records and store it in one transaction; returns how many were new."""
+    values = validate_frame(frame, COLUMNS).to_numpy(dtype=np.float64)
+    now = time.time()
+    base = base_hashes()
+    with metrics.span("ingest.insert_chunk"):
+        rows = [(digest, *row.tolist(), now) for row in values if (digest := row_hash(row)) not in base]
+        return db.add_labeled_records(rows, conn)
+
+
+def iter_ingest(source, fmt='csv', chunksize=CHUNK_SIZE, conn=None):
+    """Ingest ``source`` chunk by chunk, yielding the running IngestStats after each chunk."""
+    stats = IngestStats()
+    for chunk in iter_chunks(source, fmt, chunksize):
+        try:
+            inserted = insert_frame(chunk, conn)
+        except SchemaError as e:
+            raise SchemaError(f"Chunk {stats.chunks + 1}: {e}") from None
+        stats.rows += len(chunk)
+        stats.inserted += inserted
+        stats.chunks += 1
+        yield stats
+
+
+def ingest_file(source, fmt=None, chunksize=CHUNK_SIZE, on_chunk=None):
+    """Ingest a whole file and build the dataset version that includes it; returns IngestStats."""
+    stats = IngestStats()
+    for stats in iter_ingest(source, fmt or detect_format(source), chunksize):
+        if on_chunk:
+            on_chunk(stats)
+    if stats.inserted:
+        # Built and rendered here so the first page view after an ingest doesn't pay for it
+        import eda_cache
+        eda_cache.warm_version(dataset.current_version())
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    parser = argparse.ArgumentParser(description="Add labeled heart records from a CSV or JSONL file")
+    parser.add_argument("input")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    stats = ingest_file(args.input, chunksize=args.chunksize,
+                        on_chunk=lambda s: print(f"{s.rows} rows, {s.inserted} new, {s.rows_per_sec:,.0f} rows/sec",
+                                                 file=sys.stderr))
+    print(f"Ingested {stats.rows} rows in {stats.elapsed:.2f}s ({stats.rows_per_sec:,.0f} rows/sec), "
+          f"{stats.inserted} new, {stats.duplicates} duplicate", file=sys.stderr)
+    if stats.inserted:
+        import eda_cache
+        eda_cache.warm_version().join()
+        print(f"EDA charts rendered in {eda_cache.CACHE_DIR}", file=sys.stderr)
@@ -0,0 +1,207 @@
+"""In-process timing spans aggregated into histograms, exported in Prometheus text format.
+
+``span("db.find_user")`` times a block (or decorates a function with
+``timed``); every span name becomes a ``span`` label on one histogram. The
+exporter serves ``/metrics`` on a local port and/or rewrites a file on an
+interval. ``Profiler`` captures a cProfile of a single rerun.
+"""
+
+import bisect
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fsutil import atomic_write
+
+log = logging.getLogger(__name__)
+
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_FILE = os.getenv("METRICS_FILE")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(".cache", "profiles"))
+
+# Prometheus' default buckets, extended downwards for sub-millisecond DB calls
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds, error=False):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+        self.errors += error
+
+
+class Registry:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, error=False):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.buckets)
+            histogram.observe(seconds, error)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: (list(h.counts), h.sum, h.count, h.errors) for name, h in self._histograms.items()}
+
+    def render(self):
+        """All spans in the Prometheus text exposition format."""
+        lines = ["# HELP app_span_seconds Time spent in instrumented spans.",
+                 "# TYPE app_span_seconds histogram"]
+        snapshot = sorted(self.snapshot().items())
+        for name, (counts, total, count, _) in snapshot:
+            label = _escape(name)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'app_span_seconds_bucket{{span="{label}",le="{le}"}} {cumulative}')
+            lines.append(f'app_span_seconds_sum{{span="{label}"}} {total!r}')
+            lines.append(f'app_span_seconds_count{{span="{label}"}} {count}')
+        lines += ["# HELP app_span_errors_total Spans that ended with an exception.",
+                  "# TYPE app_span_errors_total counter"]
+        for name, (_, _, _, errors) in snapshot:
+            lines.append(f'app_span_errors_total{{span="{_escape(name)}"}} {errors}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+
+class Span:
+    """Times from creation until ``stop()`` (or the end of a ``with`` block)."""
+
+    def __init__(self, name, registry=REGISTRY):
+        self.name = name
+        self.registry = registry
+        self.started = time.perf_counter()
+        self.stopped = False
+
+    def stop(self, error=False):
+        if not self.stopped:
+            self.stopped = True
+            self.registry.observe(self.name, time.perf_counter() - self.started, error)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(error=exc_type is not None)
+
+
+def span(name):
+    return Span(name)
+
+
+def timed(name):
+    """Decorator recording every call of the function as a span."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# -------------------- Export --------------------
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write(path, registry=REGISTRY):
+    with atomic_write(path, "w") as f:
+        f.write(registry.render())
+
+
+class Exporter:
+    """Serves /metrics on 127.0.0.1:``port`` and/or rewrites ``path`` every ``interval`` seconds."""
+
+    def __init__(self, port=None, path=None, interval=15.0, host="127.0.0.1", registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self.server = None
+        self._stopping = threading.Event()
+        if port is not None:
+            handler = type("Handler", (_Handler,), {"registry": registry})
+            self.server = ThreadingHTTPServer((host, int(port)), handler)
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+            log.info("Serving metrics on http://%s:%d/metrics", host, self.server.server_address[1])
+        if path:
+            threading.Thread(target=self._write_loop, name="metrics-file", daemon=True).start()
+
+    def _write_loop(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                write(self.path, self.registry)
+            except OSError:
+                log.exception("Could not write metrics to %s", self.path)
+
+    def stop(self):
+        self._stopping.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.path:
+            write(self.path, self.registry)
+
+
+# -------------------- Profiling --------------------
+class Profiler:
+    """cProfile capture of one rerun, saved under PROFILE_DIR for snakeviz/pstats."""
+
+    def __init__(self, label="rerun"):
+        self.label = label
+        self.profile = cProfile.Profile()
+        self.path = None
+
+    def start(self):
+        self.profile.enable()
+        return self
+
+    def stop(self, top=25):
+        """Stop capturing, save the .prof file and return the top functions by cumulative time."""
+        self.profile.disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.path = os.path.join(PROFILE_DIR, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self.profile.dump_stats(self.path)
+        out = io.StringIO()
+        pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(top)
+        return out.getvalue()
@@ -0,0 +1,165 @@
+"""Cross-validated model selection over GradientBoosting and HistGradientBoosting grids.
+
+Every (config, fold) pair is an independent task run in a process pool
+sized to the machine's cores. Fold scores are cached per dataset in a JSON
+file next to the models, so rerunning with a larger grid only computes the
+new points. The winner is refit on the usual training split through
+``model_store.load_or_train`` and its held-out accuracy is shown next to
+the serving model's. Only ``--adopt`` records it as the dataset's selected
+params, which ``train_model`` then serves (and reports the accuracy of).
+
+    python model_selection.py --folds 5 --workers 8
+    python model_selection.py --folds 5 --adopt
+"""
+
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+
+import model_store
+from dataset import DATA_PATH, dataset_hash, load_frame
+from fsutil import atomic_write
+
+GRIDS = [
+    {"estimator": ["gb"], "n_estimators": [50, 100, 200], "learning_rate": [0.1, 0.5, 1.0],
+     "max_depth": [1, 2, 3], "random_state": [0]},
+    {"estimator": ["hgb"], "max_iter": [50, 100, 200], "learning_rate": [0.05, 0.1, 0.3],
+     "max_depth": [2, 3, None], "random_state": [0]},
+]
+
+# Per-process training data, set once by the pool initializer instead of pickled with every task
+_X = _y = None
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _evaluate(task):
+    params, train_idx, test_idx = task
+    started = time.perf_counter()
+    model = clone(model_store.build(params)).fit(_X.iloc[train_idx], _y.iloc[train_idx])
+    score = accuracy_score(_y.iloc[test_idx], model.predict(_X.iloc[test_idx]))
+    return score, time.perf_counter() - started
+
+
+def config_id(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def _cache_path(data_hash, folds):
+    return os.path.join(model_store.MODEL_DIR, f"{data_hash[:16]}.cv{folds}.json")
+
+
+def _load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    with atomic_write(path, "w") as f:
+        json.dump(cache, f)
+
+
+def select(data_path=DATA_PATH, grids=GRIDS, folds=5, workers=None):
+    """Cross-validate every grid point; returns (report, winning artifact, fold fits computed).
+
+    The winner is trained and stored but not served until passed to ``adopt``.
+    """
+    data = load_frame(data_path)
+    data_hash = dataset_hash(data_path)
+    # Select on the training split only; its held-out part stays untouched for the reported accuracy
+    X_train, _, y_train, _ = model_store.split(data)
+    X_train, y_train = X_train.reset_index(drop=True), y_train.reset_index(drop=True)
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=0).split(X_train, y_train))
+
+    path = _cache_path(data_hash, folds)
+    cache = _load_cache(path)  # {config id: {fold: [score, seconds]}}
+    configs = list(ParameterGrid(grids))
+    tasks, keys = [], []
+    for params in configs:
+        done = cache.setdefault(config_id(params), {})
+        for fold, (train_idx, test_idx) in enumerate(splits):
+            if str(fold) not in done:
+                tasks.append((params, train_idx, test_idx))
+                keys.append((config_id(params), str(fold)))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(X_train, y_train)) as pool:
+            for (cid, fold), result in zip(keys, pool.map(_evaluate, tasks)):
+                cache[cid][fold] = list(result)
+        _save_cache(path, cache)
+
+    report = []
+    for params in configs:
+        results = list(cache[config_id(params)].values())[:folds]
+        scores = [score for score, _ in results]
+        report.append({"params": params, "mean": statistics.mean(scores), "std": statistics.pstdev(scores),
+                       "seconds": sum(seconds for _, seconds in results)})
+    report.sort(key=lambda row: (-row["mean"], row["seconds"]))
+
+    artifact = model_store.load_or_train(data_path, report[0]["params"])
+    return report, artifact, len(tasks)
+
+
+def adopt(row, artifact, folds, data_path=DATA_PATH):
+    """Make ``row`` (a report entry) the params ``train_model`` serves for this dataset."""
+    with atomic_write(model_store.selection_path(dataset_hash(data_path)), "w") as f:
+        json.dump({"params": row["params"], "cv_mean": row["mean"], "cv_std": row["std"],
+                   "folds": folds, "key": artifact["key"]}, f)
+
+
+def compiles(model):
+    """Whether the serving path can compile ``model`` to a StumpScorer (and show contributions)."""
+    from stump_scorer import StumpScorer
+    try:
+        StumpScorer.from_model(model)
+    except ValueError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import retrain
+
+    parser = argparse.ArgumentParser(description="Cross-validated model selection for train_model")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=15, help="configs to print")
+    parser.add_argument("--adopt", action="store_true", help="serve the winner from now on")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    # What the app serves right now, including any model the Retrainer has swapped in
+    serving = retrain.load_holder().current
+    report, artifact, computed = select(folds=args.folds, workers=args.workers)
+    print(f"{'cv accuracy':>16s} {'fit time':>9s}  params")
+    for row in report[:args.top]:
+        params = {k: v for k, v in row["params"].items() if k != "random_state"}
+        print(f"{row['mean']:.3f} ± {row['std']:.3f} {row['seconds']:8.2f}s  {params}")
+    print(f"{len(report)} configs, {computed} fold fits computed ({len(report) * args.folds - computed} cached) "
+          f"in {time.perf_counter() - started:.1f}s")
+    for label, key, accuracy, model in (("Serving", serving.version, serving.accuracy, serving.estimator),
+                                        ("CV winner", artifact["key"], artifact["accuracy"], artifact["model"])):
+        compiled = "compiled scorer" if compiles(model) else "not compilable, no contributions"
+        print(f"{label:>9s} model {key}: held-out accuracy {accuracy:.3f} ({compiled})")
+    if artifact["key"] == serving.version:
+        print("The winner is already being served.")
+    elif args.adopt:
+        adopt(report[0], artifact, args.folds)
+        print(f"Adopted {artifact['key']}; the app serves it from its next start.")
+    else:
+        print("Not adopted; rerun with --adopt to serve the winner.")
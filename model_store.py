@@ -0,0 +1,104 @@
+"""On-disk store of trained models, keyed by dataset content and hyperparameters."""
+
+import hashlib
+import json
+import os
+
+import joblib
+import sklearn
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+
+import metrics
+from dataset import DATA_PATH, dataset_hash, load_frame
+from fsutil import atomic_write
+from schema import FEATURES, TARGET
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+DEFAULT_PARAMS = {"n_estimators": 100, "learning_rate": 1.0, "max_depth": 1, "random_state": 0}
+
+# Params may name the estimator under "estimator"; without it they are GradientBoosting params
+ESTIMATORS = {"gb": GradientBoostingClassifier, "hgb": HistGradientBoostingClassifier}
+
+
+def model_key(data_hash, params):
+    # Pickles are tied to the sklearn version, so it is part of the key too
+    payload = json.dumps({"data": data_hash, "params": params, "sklearn": sklearn.__version__}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def split(data):
+    return train_test_split(data[FEATURES], data[TARGET], test_size=0.2, random_state=0)
+
+
+def build(params):
+    params = dict(params)
+    return ESTIMATORS[params.pop("estimator", "gb")](**params)
+
+
+def train(data, params):
+    X_train, X_test, y_train, y_test = split(data)
+    model = build(params)
+    model.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, model.predict(X_test))
+    return model, accuracy
+
+
+def model_path(key):
+    return os.path.join(MODEL_DIR, f"{key}.joblib")
+
+
+def save(key, artifact):
+    # Written to a temp file first so other processes never see a half-written model
+    with atomic_write(model_path(key)) as f:
+        joblib.dump(artifact, f)
+
+
+def load(key):
+    # Models are dumped uncompressed, so their numpy arrays can be mapped
+    # read-only and shared by every process that loads the same key
+    try:
+        return joblib.load(model_path(key), mmap_mode="r")
+    except FileNotFoundError:
+        return None
+
+
+def selection_path(data_hash):
+    return os.path.join(MODEL_DIR, f"{data_hash[:16]}.selected.json")
+
+
+def current_params(data_hash):
+    """Winning params from the last model selection run on this dataset, else DEFAULT_PARAMS."""
+    try:
+        with open(selection_path(data_hash)) as f:
+            return json.load(f)["params"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return dict(DEFAULT_PARAMS)
+
+
+def load_or_train(data_path=DATA_PATH, params=None):
+    """Return the artifact dict (model, accuracy, key, ...) for this dataset and params."""
+    data_hash = dataset_hash(data_path)
+    params = dict(current_params(data_hash) if params is None else params)
+    key = model_key(data_hash, params)
+
+    artifact = load(key)
+    if artifact is None:
+        data = load_frame(data_path)
+        model, accuracy = train(data, params)
+        artifact = {"model": model, "accuracy": accuracy, "key": key,
+                    "params": params, "data_hash": data_hash}
+        save(key, artifact)
+    return artifact
+
+
+@metrics.timed("model.predict")
+def predict_heart_disease(model, input_data):
+    prediction = model.predict([input_data])
+    return prediction[0]
+
+
+if __name__ == "__main__":
+    artifact = load_or_train()
+    print(f"Model {artifact['key']} (accuracy {artifact['accuracy']:.3f}) at {model_path(artifact['key'])}")
@@ -0,0 +1,235 @@
+"""Durable email outbox in users.db, drained by a background worker over a reused SMTP connection."""
+
+import collections
+import logging
+import os
+import smtplib
+import threading
+import time
+
+import db
+import metrics
+
+log = logging.getLogger(__name__)
+
+SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"
+
+# Rows stuck in 'sending' this long belong to a worker that died mid-batch
+STALE_CLAIM_SECONDS = 600
+
+
+@metrics.timed("db.enqueue_email")
+def enqueue(msg, conn=None):
+    """Queue a MIME message; returns immediately without touching the network."""
+    now = time.time()
+    with db.connection(conn=conn) as conn, conn:
+        cur = conn.execute('''INSERT INTO email_outbox (sender, recipient, message, next_attempt_at, created_at)
+                              VALUES (?, ?, ?, ?, ?)''', (msg['From'], msg['To'], msg.as_string(), now, now))
+    return cur.lastrowid
+
+
+def queue_depth(conn=None):
+    with db.connection(conn=conn) as conn:
+        return conn.execute("SELECT COUNT(*) FROM email_outbox "
+                            "WHERE status IN ('pending', 'sending')").fetchone()[0]
+
+
+def status(conn=None, recent=1000):
+    """Emails per status, and how long the last ``recent`` sent ones waited from enqueue to delivery."""
+    with db.connection(conn=conn) as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall())
+        waits = sorted(row[0] for row in conn.execute(
+            "SELECT sent_at - created_at FROM email_outbox WHERE status = 'sent' ORDER BY sent_at DESC LIMIT ?",
+            (recent,)))
+    return {
+        "queue_depth": counts.get("pending", 0) + counts.get("sending", 0),
+        "by_status": counts,
+        "avg_delivery_latency": sum(waits) / len(waits) if waits else None,
+        "p95_delivery_latency": waits[int(len(waits) * 0.95)] if waits else None,
+    }
+
+
+class OutboxWorker(threading.Thread):
+    def __init__(self, db_path=None, host=SMTP_SERVER, port=SMTP_PORT, username=None, password=None,
+                 starttls=SMTP_STARTTLS, batch_size=20, poll_interval=2.0, max_attempts=5,
+                 base_backoff=2.0, keepalive_interval=30.0, idle_timeout=300.0):
+        super().__init__(name="email-outbox", daemon=True)
+        self.db_path = db_path or db.DB_PATH
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._server = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=200)
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.connections = 0
+
+    # ---- public API ----
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def stats(self):
+        with db.connection(self.db_path) as conn:
+            depth = queue_depth(conn)
+        with self._lock:
+            latencies = sorted(self._latencies)
+        return {
+            "queue_depth": depth,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "connections": self.connections,
+            "avg_send_latency": sum(latencies) / len(latencies) if latencies else None,
+            "p95_send_latency": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        }
+
+    # ---- worker loop ----
+    def run(self):
+        conn = db.get_connection(self.db_path)
+        try:
+            while not self._stopping.is_set():
+                batch = self._claim(conn)
+                if batch:
+                    self._send_batch(conn, batch)
+                    continue
+                if self._server and time.time() - self._last_used > self.idle_timeout:
+                    self._disconnect()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+        finally:
+            self._disconnect()
+
+    def drain(self):
+        """Send everything that is due right now on the calling thread."""
+        try:
+            with db.connection(self.db_path) as conn:
+                while batch := self._claim(conn):
+                    self._send_batch(conn, batch)
+        finally:
+            self._disconnect()
+
+    def _claim(self, conn):
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute('''SELECT id, sender, recipient, message, attempts FROM email_outbox
+                                   WHERE (status = 'pending' AND next_attempt_at <= ?)
+                                      OR (status = 'sending' AND claimed_at < ?)
+                                   ORDER BY next_attempt_at LIMIT ?''',
+                                (now, now - STALE_CLAIM_SECONDS, self.batch_size)).fetchall()
+            conn.executemany("UPDATE email_outbox SET status = 'sending', claimed_at = ? WHERE id = ?",
+                             [(now, row[0]) for row in rows])
+        return rows
+
+    def _send_batch(self, conn, batch):
+        results = []
+        for row_id, sender, recipient, message, attempts in batch:
+            started = time.perf_counter()
+            try:
+                with metrics.span("smtp.send"):
+                    self._connection().sendmail(sender, [recipient], message)
+            except smtplib.SMTPRecipientsRefused as e:
+                results.append(self._give_up(row_id, attempts, e))
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                results.append(self._retry(row_id, attempts, e))
+            else:
+                self._last_used = time.time()
+                with self._lock:
+                    self._latencies.append(time.perf_counter() - started)
+                self.sent += 1
+                results.append(("sent", None, self._last_used, None, attempts + 1, row_id))
+
+        with conn:
+            conn.executemany('''UPDATE email_outbox SET status = ?, next_attempt_at = COALESCE(?, next_attempt_at),
+                                sent_at = ?, last_error = ?, attempts = ? WHERE id = ?''', results)
+
+    def _retry(self, row_id, attempts, error):
+        attempts += 1
+        if attempts >= self.max_attempts:
+            return self._give_up(row_id, attempts - 1, error)
+        self.retried += 1
+        delay = self.base_backoff * 2 ** (attempts - 1)
+        log.warning("Email %s failed (attempt %d), retrying in %.0fs: %s", row_id, attempts, delay, error)
+        return ("pending", time.time() + delay, None, str(error), attempts, row_id)
+
+    def _give_up(self, row_id, attempts, error):
+        self.failed += 1
+        log.error("Email %s failed permanently: %s", row_id, error)
+        return ("failed", None, None, str(error), attempts + 1, row_id)
+
+    # ---- SMTP connection reuse ----
+    def _connection(self):
+        if self._server is not None and time.time() - self._last_used > self.keepalive_interval:
+            try:
+                self._server.noop()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+
+        if self._server is None:
+            with metrics.span("smtp.connect"):
+                server = smtplib.SMTP(self.host, self.port, timeout=30)
+                try:
+                    # Extensions (AUTH among them) are only known after EHLO, and
+                    # STARTTLS discards them, so greet again on the encrypted channel
+                    server.ehlo()
+                    if self.starttls:
+                        server.starttls()
+                        server.ehlo()
+                    if self.username and self.password:
+                        server.login(self.username, self.password)
+                except BaseException:
+                    server.close()
+                    raise
+            self._server = server
+            self._last_used = time.time()
+            self.connections += 1
+        return self._server
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self._server = None
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Inspect or drain the email outbox")
+    parser.add_argument("command", choices=["status", "drain"])
+    args = parser.parse_args()
+
+    if args.command == "drain":
+        worker = OutboxWorker(username=os.getenv("EMAIL_USERNAME"), password=os.getenv("EMAIL_PASSWORD"))
+        worker.drain()
+        print(worker.stats())
+    else:
+        # A worker's own counters start at zero, so report what the table recorded
+        print(status())
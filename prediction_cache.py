@@ -0,0 +1,105 @@
+"""Bounded LRU cache of predictions keyed by model version and the normalized 13-feature input.
+
+The in-process LRU is always used. Passing ``shared_path`` adds a second
+level in a small SQLite file, so worker processes on the same host reuse
+each other's results. Entries from other model versions are dropped as
+soon as a new version is seen.
+"""
+
+import collections
+import json
+import threading
+
+import db
+
+
+def normalize(features):
+    # Form values arrive as ints, floats or numpy scalars; 50 and 50.0 must share an entry
+    return tuple(round(float(value), 4) for value in features)
+
+
+class PredictionCache:
+    def __init__(self, maxsize=4096, shared_path=None, shared_maxsize=None):
+        self.maxsize = maxsize
+        self.shared_path = shared_path
+        self.shared_maxsize = shared_maxsize or maxsize * 4
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if shared_path:
+            conn = db.connect(shared_path)
+            with conn:
+                conn.execute('''CREATE TABLE IF NOT EXISTS predictions (
+                                    version TEXT,
+                                    features TEXT,
+                                    result TEXT,
+                                    PRIMARY KEY (version, features))''')
+            conn.close()
+
+    def get_or_compute(self, version, features, compute):
+        """Cached ``compute()`` for these features; results must be JSON-serializable if shared."""
+        key = normalize(features)
+        with self._lock:
+            if version != self._version:
+                self._switch_version(version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        result = self._shared_get(version, key)
+        if result is not None:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            result = compute()
+            self._shared_put(version, key, result)
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = result
+                if len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+    def _switch_version(self, version):
+        self._entries.clear()
+        self._version = version
+        if self.shared_path:
+            with db.connection(self.shared_path, schema=False) as conn, conn:
+                conn.execute("DELETE FROM predictions WHERE version != ?", (version,))
+
+    def _shared_get(self, version, key):
+        if not self.shared_path:
+            return None
+        with db.connection(self.shared_path, schema=False) as conn:
+            row = conn.execute("SELECT result FROM predictions WHERE version = ? AND features = ?",
+                               (version, json.dumps(key))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _shared_put(self, version, key, result):
+        if not self.shared_path:
+            return
+        with db.connection(self.shared_path, schema=False) as conn, conn:
+            cur = conn.execute("INSERT OR REPLACE INTO predictions (version, features, result) VALUES (?, ?, ?)",
+                               (version, json.dumps(key), json.dumps(result)))
+            # Trim the oldest rows in bulk once the table runs well past its bound
+            if cur.lastrowid and cur.lastrowid % 256 == 0:
+                conn.execute('''DELETE FROM predictions WHERE rowid <= (
+                                    SELECT MAX(rowid) - ? FROM predictions)''', (self.shared_maxsize,))
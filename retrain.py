@@ -0,0 +1,215 @@
+"""Background retraining on newly labeled records, with an atomic swap of the serving model.
+
+New records go into the ``labeled_records`` table (see ``add_records``). A
+Retrainer thread notices them, grows the current ensemble with extra
+boosting stages via ``warm_start`` (or refits from scratch once it has
+grown too large, or for models without warm start), and validates the
+candidate on the same held-out split ``train_model`` uses. If it is no
+worse, the candidate replaces the serving model in one reference
+assignment. Requests already running keep the model they started with.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score
+
+import db
+import model_store
+from dataset import DATA_PATH, dataset_hash, load_frame
+from fsutil import atomic_write
+from schema import COLUMNS, FEATURES, TARGET
+
+log = logging.getLogger(__name__)
+
+ServingModel = namedtuple("ServingModel", "model accuracy version estimator last_record_id")
+
+
+def add_records(frame):
+    """Validate labeled records (the 13 features plus target) and store them; returns how many were new."""
+    import ingest
+    return ingest.insert_frame(frame)
+
+
+def _serving(estimator, accuracy, version, last_record_id, data):
+    from stump_scorer import StumpScorer
+    # Compile once per version; every worker process then maps the same scorer files
+    path = os.path.join(model_store.MODEL_DIR, f"{version}.scorer")
+    try:
+        model = StumpScorer.load(path)
+    except FileNotFoundError:
+        try:
+            model = StumpScorer.load(StumpScorer.from_model(estimator, check_X=data[FEATURES]).save(path))
+        except ValueError:
+            model = estimator
+    return ServingModel(model, accuracy, version, estimator, last_record_id)
+
+
+class ModelHolder:
+    """Holds the current ServingModel; readers take ``holder.current`` once per request."""
+
+    def __init__(self, serving):
+        self.current = serving
+        self._lock = threading.Lock()
+
+    def swap(self, serving):
+        with self._lock:
+            previous, self.current = self.current, serving
+        return previous
+
+
+def _pointer_path(base_key):
+    return os.path.join(model_store.MODEL_DIR, f"{base_key}.latest.json")
+
+
+def _latest_key(base_key):
+    try:
+        with open(_pointer_path(base_key)) as f:
+            return json.load(f)["key"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def serving_key(data_path=DATA_PATH, params=None):
+    """Key of the model ``load_holder`` would serve now, found without loading any model."""
+    data_hash = dataset_hash(data_path)
+    base_key = model_store.model_key(data_hash, model_store.current_params(data_hash) if params is None else params)
+    return _latest_key(base_key) or base_key
+
+
+def load_holder(data_path=DATA_PATH, params=None):
+    """Start from the latest retrained model for this dataset if there is one, else the base model."""
+    artifact = model_store.load_or_train(data_path, params)
+    data = load_frame(data_path)
+    latest_key = _latest_key(artifact["key"])
+    latest = model_store.load(latest_key) if latest_key else None
+
+    if latest is not None:
+        return ModelHolder(_serving(latest["model"], latest["accuracy"], latest["key"],
+                                    latest["last_record_id"], data))
+    return ModelHolder(_serving(artifact["model"], artifact["accuracy"], artifact["key"], 0, data))
+
+
+class Retrainer(threading.Thread):
+    def __init__(self, holder, data_path=DATA_PATH, poll_interval=60.0, min_new_records=20,
+                 extra_estimators=20, max_estimators=400, tolerance=0.01):
+        super().__init__(name="retrainer", daemon=True)
+        self.holder = holder
+        self.data_path = data_path
+        self.poll_interval = poll_interval
+        self.min_new_records = min_new_records
+        self.extra_estimators = extra_estimators
+        self.max_estimators = max_estimators
+        self.tolerance = tolerance
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self.swaps = 0
+        self.rejected = 0
+
+        base = model_store.load_or_train(data_path)
+        self.base_key = base["key"]
+        self.base_params = base["params"]
+        data = load_frame(data_path)
+        self.X_train, self.X_test, self.y_train, self.y_test = model_store.split(data)
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                self.retrain_once()
+            except Exception:
+                log.exception("Retraining failed")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def retrain_once(self, force=False):
+        """Train, validate and maybe swap in a candidate; returns True if the serving model changed."""
+        current = self.holder.current
+        # Two index lookups decide whether there is anything to do; the records are only
+        # read once enough of them have arrived
+        last_record_id = db.last_labeled_record_id()
+        if last_record_id <= current.last_record_id:
+            return False
+        added = db.count_labeled_records(current.last_record_id, last_record_id)
+        if not added or (added < self.min_new_records and not force):
+            return False
+
+        records = [r for batch in db.iter_labeled_records(0, last_record_id) for r in batch]
+        extra = pd.DataFrame([r[1:] for r in records], columns=COLUMNS)
+        X = pd.concat([self.X_train, extra[FEATURES]], ignore_index=True)
+        y = pd.concat([self.y_train, extra[TARGET].astype(self.y_train.dtype)], ignore_index=True)
+
+        started = time.perf_counter()
+        candidate = self._fit(current.estimator, X, y)
+        accuracy = accuracy_score(self.y_test, candidate.predict(self.X_test))
+        elapsed = time.perf_counter() - started
+
+        if accuracy < current.accuracy - self.tolerance:
+            self.rejected += 1
+            log.warning("Rejected retrained model: accuracy %.3f vs serving %.3f", accuracy, current.accuracy)
+            # Still move the watermark so the same records do not trigger a retrain every poll
+            self.holder.swap(current._replace(last_record_id=last_record_id))
+            return False
+
+        key = hashlib.sha256(f"{self.base_key}:{last_record_id}:{candidate.get_params()}".encode()).hexdigest()[:16]
+        model_store.save(key, {"model": candidate, "accuracy": accuracy, "key": key, "params": candidate.get_params(),
+                               "data_hash": self.base_key, "last_record_id": last_record_id})
+        self._write_pointer(key)
+        self.holder.swap(_serving(candidate, accuracy, key, last_record_id, X))
+        self.swaps += 1
+        log.info("Swapped in model %s (accuracy %.3f, %d new records, %.2fs)",
+                 key, accuracy, added, elapsed)
+        return True
+
+    def _fit(self, estimator, X, y):
+        # GradientBoosting counts stages in n_estimators, HistGradientBoosting in max_iter
+        stages = "n_estimators" if "n_estimators" in estimator.get_params() else "max_iter"
+        grown = estimator.get_params()[stages] + self.extra_estimators
+        if "warm_start" in estimator.get_params() and grown <= self.max_estimators:
+            # Keep the fitted stages and add a few more fitted on the enlarged data
+            candidate = copy.deepcopy(estimator)
+            candidate.set_params(warm_start=True, **{stages: grown})
+        else:
+            candidate = clone(estimator).set_params(**{k: v for k, v in self.base_params.items()
+                                                       if k in estimator.get_params()})
+            if hasattr(candidate, "warm_start"):
+                candidate.set_params(warm_start=False)
+        return candidate.fit(X, y)
+
+    def _write_pointer(self, key):
+        with atomic_write(_pointer_path(self.base_key), "w") as f:
+            json.dump({"key": key}, f)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Add labeled records or run one retraining pass")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="add labeled records from a CSV file")
+    add_parser.add_argument("path")
+    commands.add_parser("run-once", help="retrain now if there are new records")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        print(f"Added {add_records(pd.read_csv(args.path, encoding='utf-8-sig'))} new record(s)")
+    else:
+        retrainer = Retrainer(load_holder())
+        changed = retrainer.retrain_once(force=True)
+        print(f"Serving model {retrainer.holder.current.version} ({'updated' if changed else 'unchanged'})")
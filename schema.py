@@ -0,0 +1,77 @@
+"""Column layout of the heart dataset and validation shared by the app and its tools."""
+
+import hashlib
+
+import pandas as pd
+
+FEATURES = ['age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+            'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal']
+TARGET = 'target'
+COLUMNS = FEATURES + [TARGET]
+
+# Allowed ranges, matching the inputs on the Predict form (ca goes to 4 in heart.csv)
+RANGES = {
+    'age': (20, 100),
+    'sex': (0, 1),
+    'cp': (0, 3),
+    'trestbps': (80, 200),
+    'chol': (100, 600),
+    'fbs': (0, 1),
+    'restecg': (0, 2),
+    'thalach': (60, 220),
+    'exang': (0, 1),
+    'oldpeak': (0.0, 6.2),
+    'slope': (0, 2),
+    'ca': (0, 4),
+    'thal': (0, 3),
+    'target': (0, 1),
+}
+# Every column but oldpeak holds whole numbers (the store keeps them as integers)
+CONTINUOUS = {'oldpeak'}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def normalize_columns(frame):
+    # heart.csv starts with a UTF-8 BOM, which ends up glued to the first header
+    frame.columns = [str(col).lstrip('﻿').strip() for col in frame.columns]
+    return frame
+
+
+def validate_frame(frame, columns=FEATURES, check_ranges=True):
+    """Return ``frame[columns]`` as numbers, raising SchemaError on bad input."""
+    normalize_columns(frame)
+    missing = [col for col in columns if col not in frame.columns]
+    if missing:
+        raise SchemaError(f"Missing columns: {', '.join(missing)}")
+
+    out = frame[columns].apply(pd.to_numeric, errors='coerce')
+    bad_rows = out.isna().any(axis=1)
+    if bad_rows.any():
+        first = out.index[bad_rows.argmax()]
+        raise SchemaError(f"{int(bad_rows.sum())} row(s) have missing or non-numeric values (first at row {first})")
+
+    if check_ranges:
+        for col in columns:
+            if col not in RANGES:
+                continue
+            low, high = RANGES[col]
+            outside = ~out[col].between(low, high)
+            if outside.any():
+                first = out.index[outside.argmax()]
+                raise SchemaError(f"Column '{col}' has {int(outside.sum())} value(s) outside {low}-{high} (first at row {first})")
+        for col in columns:
+            if col in CONTINUOUS:
+                continue
+            fractional = out[col] != out[col].round()
+            if fractional.any():
+                first = out.index[fractional.argmax()]
+                raise SchemaError(f"Column '{col}' has {int(fractional.sum())} non-integer value(s) (first at row {first})")
+    return out
+
+
+def row_hash(values):
+    """Stable hash of one record's values, used to skip duplicate records."""
+    return hashlib.sha1(",".join(f"{float(v):g}" for v in values).encode()).hexdigest()
@@ -0,0 +1,143 @@
+"""Signed, expiring session tokens so a returning browser skips the login form.
+
+A token is ``<id>.<expires_at>.<signature>``: a random id, its expiry and an
+HMAC over both. Forged or expired tokens are rejected before any lookup.
+Valid ones are checked against the ``sessions`` table (one primary-key
+probe on a hash of the id, so the table never holds usable tokens), with a
+small in-process LRU in front. Cached entries are re-checked against the
+table after ``CACHE_SECONDS``, which bounds how long a session revoked by
+another process stays usable here.
+
+The token travels in the page URL, so it is only issued when the user asks
+to be remembered, lives for ``SESSION_TTL`` (12 hours by default) and is
+replaced by a fresh one every time it is used to resume (``rotate``).
+"""
+
+import base64
+import collections
+import hashlib
+import hmac
+import os
+import secrets
+import tempfile
+import threading
+import time
+
+import db
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(12 * 3600)))
+SECRET_PATH = os.getenv("SESSION_SECRET_PATH", os.path.join(".cache", "session_secret"))
+CACHE_SECONDS = 60.0
+
+_secret = None
+_secret_lock = threading.Lock()
+
+
+def _get_secret():
+    # SESSION_SECRET must be shared by every process serving the app; without it,
+    # one is generated on first use and kept next to the other local state
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                env = os.getenv("SESSION_SECRET")
+                _secret = env.encode() if env else _secret_from_file(SECRET_PATH)
+    return _secret
+
+
+def _secret_from_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".")  # created 0600
+    with os.fdopen(fd, "wb") as f:
+        f.write(secrets.token_bytes(32))
+    try:
+        # link() never replaces an existing file, so concurrent first runs agree on one secret
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp_path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _sign(payload):
+    digest = hmac.new(_get_secret(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+
+def _id_hash(session_id):
+    return hashlib.sha256(session_id.encode()).hexdigest()
+
+
+class SessionStore:
+    def __init__(self, maxsize=1024, db_path=None):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self._entries = collections.OrderedDict()  # id hash -> (username, expires_at, checked_at)
+        self._lock = threading.Lock()
+
+    def issue(self, username, ttl=SESSION_TTL):
+        session_id = secrets.token_urlsafe(18)
+        expires_at = int(time.time() + ttl)
+        with db.connection(self.db_path) as conn:
+            db.create_session(_id_hash(session_id), username, expires_at, conn)
+        payload = f"{session_id}.{expires_at}"
+        return f"{payload}.{_sign(payload)}"
+
+    def validate(self, token):
+        """The username the token was issued to, or None if it is forged, expired or revoked."""
+        id_hash = self._check(token)
+        if id_hash is None:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(id_hash)
+            if entry is not None and now < entry[1] and now - entry[2] < CACHE_SECONDS:
+                self._entries.move_to_end(id_hash)
+                return entry[0]
+
+        with db.connection(self.db_path) as conn:
+            row = db.find_session(id_hash, conn)
+        with self._lock:
+            if row is None:
+                self._entries.pop(id_hash, None)
+                return None
+            self._entries[id_hash] = (row[0], row[1], now)
+            self._entries.move_to_end(id_hash)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return row[0]
+
+    def revoke(self, token):
+        id_hash = self._check(token)
+        if id_hash is None:
+            return
+        with self._lock:
+            self._entries.pop(id_hash, None)
+        with db.connection(self.db_path) as conn:
+            db.delete_session(id_hash, conn)
+
+    def rotate(self, token, ttl=SESSION_TTL):
+        """Exchange a valid token for a new one; (username, new token), or None if it isn't valid."""
+        username = self.validate(token)
+        if username is None:
+            return None
+        self.revoke(token)
+        return username, self.issue(username, ttl)
+
+    @staticmethod
+    def _check(token):
+        try:
+            session_id, expires_at, signature = token.split(".")
+            expired = float(expires_at) <= time.time()
+        except (AttributeError, ValueError):
+            return None
+        if expired or not hmac.compare_digest(signature, _sign(f"{session_id}.{expires_at}")):
+            return None
+        return _id_hash(session_id)
@@ -0,0 +1,138 @@
+"""Minimal local SMTP server that accepts and records messages, for exercising the outbox without Gmail.
+
+Run it with ``python smtp_stub.py [port]`` and point the app at it with
+``SMTP_SERVER=localhost SMTP_PORT=<port> SMTP_STARTTLS=0``. It advertises
+``AUTH PLAIN LOGIN`` and records every login; pass ``credentials`` to reject
+other logins, and ``require_auth=True`` to refuse mail from unauthenticated
+sessions the way Gmail does.
+"""
+
+import base64
+import binascii
+import socketserver
+import sys
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def read_line(self):
+        return self.rfile.readline().decode(errors="replace").strip()
+
+    def authenticate(self, command):
+        # AUTH PLAIN <initial response> | AUTH LOGIN [<username>]
+        parts = command.split()
+        mechanism = parts[1].upper() if len(parts) > 1 else ""
+        try:
+            if mechanism == "PLAIN":
+                if len(parts) > 2:
+                    response = parts[2]
+                else:
+                    self.reply("334 ")
+                    response = self.read_line()
+                _, username, password = base64.b64decode(response).decode().split("\0")
+            elif mechanism == "LOGIN":
+                if len(parts) > 2:
+                    username = base64.b64decode(parts[2]).decode()
+                else:
+                    self.reply("334 VXNlcm5hbWU6")
+                    username = base64.b64decode(self.read_line()).decode()
+                self.reply("334 UGFzc3dvcmQ6")
+                password = base64.b64decode(self.read_line()).decode()
+            else:
+                self.reply("504 Unrecognized authentication type")
+                return None
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            self.reply("501 Malformed authentication response")
+            return None
+
+        server = self.server
+        if server.credentials is not None and server.credentials.get(username) != password:
+            self.reply("535 Authentication credentials invalid")
+            return None
+        with server.lock:
+            server.logins.append(username)
+        self.reply("235 Authentication successful")
+        return username
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost stub SMTP ready")
+        envelope = {}
+        user = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if server.delay:
+                time.sleep(server.delay)
+
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "HELO":
+                self.reply("250 localhost")
+            elif verb == "AUTH":
+                if user is not None:
+                    self.reply("503 Already authenticated")
+                else:
+                    user = self.authenticate(command)
+            elif verb == "MAIL" and server.require_auth and user is None:
+                self.reply("530 Authentication required")
+            elif verb == "MAIL":
+                envelope = {"from": command[10:].strip("<> "), "to": [], "user": user}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope.setdefault("to", []).append(command[8:].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    body.append(data)
+                envelope["data"] = b"".join(body)
+                with server.lock:
+                    server.messages.append(envelope)
+                self.reply("250 OK queued")
+            elif verb in ("NOOP", "RSET"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, credentials=None, require_auth=False):
+        super().__init__((host, port), _Handler)
+        self.credentials = credentials
+        self.require_auth = require_auth
+        self.logins = []
+        self.messages = []
+        self.connections = 0
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="smtp-stub", daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    server = StubSMTPServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 1025)
+    print(f"Stub SMTP server listening on port {server.port}")
+    server.serve_forever()
@@ -0,0 +1,156 @@
+"""Additive lookup-table scorer compiled from a depth-1 GradientBoostingClassifier.
+
+With ``max_depth=1`` every tree is a stump on a single feature, so the
+model's raw score is a sum of per-feature step functions. Compiling the
+ensemble merges all stumps on a feature into one sorted threshold array and
+one table of summed leaf values; scoring is then one ``searchsorted`` per
+feature instead of walking every tree. A compiled scorer can be saved as
+``.npy`` files and loaded memory-mapped, so worker processes share its tables.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from schema import FEATURES
+
+
+class StumpScorer:
+    def __init__(self, features, thresholds, values, offsets, bias, classes):
+        self.features = list(features)
+        # Feature i owns thresholds[offsets[i]:offsets[i + 1]] and the one-longer
+        # slice of values starting at offsets[i] + i.
+        self.thresholds = thresholds
+        self.values = values
+        self.offsets = offsets
+        self.bias = float(bias)
+        self.classes_ = np.asarray(classes)
+
+    @classmethod
+    def from_model(cls, model, features=FEATURES, check_X=None):
+        """Compile a fitted binary GradientBoostingClassifier made only of stumps.
+
+        Raises ValueError for any other model. If ``check_X`` is given, the
+        per-feature contributions are centered on it and the compiled scorer
+        is verified against ``model`` on it.
+        """
+        from sklearn.ensemble import GradientBoostingClassifier
+
+        if not isinstance(model, GradientBoostingClassifier) or model.n_classes_ != 2:
+            raise ValueError("only binary GradientBoostingClassifier models can be compiled")
+        if model.estimators_.shape[1] != 1:
+            raise ValueError("expected a single tree per boosting stage")
+
+        stumps = [[] for _ in features]
+        for (tree,) in model.estimators_:
+            tree = tree.tree_
+            if tree.node_count == 1:
+                continue  # a constant tree only shifts the bias, which is calibrated below
+            if tree.node_count != 3:
+                raise ValueError("only depth-1 trees (stumps) can be compiled")
+            left, right = tree.children_left[0], tree.children_right[0]
+            stumps[tree.feature[0]].append((tree.threshold[0],
+                                            model.learning_rate * tree.value[left].ravel()[0],
+                                            model.learning_rate * tree.value[right].ravel()[0]))
+
+        thresholds, values, offsets = [], [], [0]
+        for feature_stumps in stumps:
+            feature_stumps.sort()
+            t = np.array([s[0] for s in feature_stumps], dtype=np.float64)
+            left = np.array([s[1] for s in feature_stumps], dtype=np.float64)
+            right = np.array([s[2] for s in feature_stumps], dtype=np.float64)
+            # values[k]: x is above the first k thresholds (goes right) and at or below the rest (goes left)
+            table = (np.concatenate(([0.0], np.cumsum(right)))
+                     + np.concatenate((np.cumsum(left[::-1])[::-1], [0.0])))
+            thresholds.append(t)
+            values.append(table)
+            offsets.append(offsets[-1] + len(t))
+
+        scorer = cls(features, np.concatenate(thresholds), np.concatenate(values),
+                     np.array(offsets, dtype=np.int64), 0.0, model.classes_)
+
+        # The prior (init estimator) and any constant trees make up the bias
+        probe = np.zeros((1, len(features)))
+        scorer.bias = float(model.decision_function(_as_model_input(model, probe))[0]
+                            - scorer.contributions(probe).sum())
+
+        if check_X is not None:
+            # Center each feature's table on check_X so contributions read as
+            # "relative to a typical patient"; the bias absorbs the shift.
+            means = scorer.contributions(check_X).mean(axis=0)
+            for i, mean in enumerate(means):
+                scorer.values[scorer.offsets[i] + i:scorer.offsets[i + 1] + i + 1] -= mean
+            scorer.bias += float(means.sum())
+
+            expected = model.decision_function(_as_model_input(model, check_X))
+            if not np.allclose(scorer.decision_function(check_X), expected, rtol=0, atol=1e-9):
+                raise ValueError("compiled scorer does not match the model")
+        return scorer
+
+    ARRAYS = ("thresholds", "values", "offsets")
+
+    def save(self, path):
+        """Write the tables under directory ``path``; a no-op if another process already did."""
+        if os.path.exists(os.path.join(path, "meta.json")):
+            return path
+        parent = os.path.dirname(path) or "."
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix=".scorer-")
+        try:
+            for name in self.ARRAYS:
+                np.save(os.path.join(staging, f"{name}.npy"), getattr(self, name))
+            with open(os.path.join(staging, "meta.json"), "w") as f:
+                json.dump({"features": self.features, "bias": self.bias, "classes": self.classes_.tolist()}, f)
+            os.chmod(staging, 0o755)
+            os.rename(staging, path)
+        except OSError:
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return path
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Attach to saved tables; raises FileNotFoundError if there are none."""
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in cls.ARRAYS]
+        return cls(meta["features"], *arrays, meta["bias"], meta["classes"])
+
+    def _matrix(self, X):
+        if hasattr(X, "columns"):
+            X = X[self.features].to_numpy()
+        # sklearn trees compare float32 inputs against their thresholds; do the same
+        return np.asarray(X, dtype=np.float32).astype(np.float64).reshape(-1, len(self.features))
+
+    def contributions(self, X):
+        """Per-feature share of the raw (log-odds) score, shape (n_samples, n_features)."""
+        X = self._matrix(X)
+        out = np.empty_like(X)
+        for i in range(len(self.features)):
+            start, stop = self.offsets[i], self.offsets[i + 1]
+            idx = np.searchsorted(self.thresholds[start:stop], X[:, i], side="left")
+            out[:, i] = self.values[start + i + idx]
+        return out
+
+    def decision_function(self, X):
+        return self.bias + self.contributions(X).sum(axis=1)
+
+    def predict_proba(self, X):
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack((1.0 - positive, positive))
+
+    def predict(self, X):
+        # A score of exactly 0 is the positive class, as in GradientBoostingClassifier.predict
+        return self.classes_[(self.decision_function(X) >= 0).astype(int)]
+
+
+def _as_model_input(model, X):
+    if hasattr(X, "columns") or not hasattr(model, "feature_names_in_"):
+        return X
+    import pandas as pd
+    return pd.DataFrame(np.asarray(X).reshape(-1, len(model.feature_names_in_)), columns=model.feature_names_in_)
@@ -0,0 +1,69 @@
+"""StumpScorer must give the same predictions as the GradientBoostingClassifier it was compiled from."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import model_store  # noqa: E402
+from schema import FEATURES, RANGES, normalize_columns  # noqa: E402
+from stump_scorer import StumpScorer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def data():
+    return normalize_columns(pd.read_csv(os.path.join(ROOT, "heart.csv")))
+
+
+@pytest.fixture(scope="module")
+def model(data):
+    return model_store.train(data, model_store.DEFAULT_PARAMS)[0]
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["raw", "centered"])
+def scorer(request, model, data):
+    return StumpScorer.from_model(model, check_X=data[FEATURES] if request.param else None)
+
+
+def probe_grid(scorer, data, rng):
+    """Uniform inputs over the form ranges, plus inputs on and either side of every split threshold."""
+    known = data[FEATURES].to_numpy(dtype=np.float64)
+    rows = [np.column_stack([rng.uniform(*RANGES[f], 2000) for f in FEATURES])]
+    for i in range(len(FEATURES)):
+        t = scorer.thresholds[scorer.offsets[i]:scorer.offsets[i + 1]]
+        values = np.concatenate((t, np.nextafter(t, np.inf), np.nextafter(t, -np.inf)))
+        probe = known[rng.integers(len(known), size=len(values))].copy()
+        probe[:, i] = values
+        rows.append(probe)
+    return pd.DataFrame(np.vstack(rows), columns=FEATURES)
+
+
+def assert_same(scorer, model, X):
+    np.testing.assert_array_equal(scorer.predict(X), model.predict(X))
+    np.testing.assert_allclose(scorer.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-9)
+
+
+def test_matches_sklearn_on_dataset(scorer, model, data):
+    assert_same(scorer, model, data[FEATURES])
+
+
+def test_matches_sklearn_on_probe_grid(scorer, model, data):
+    assert_same(scorer, model, probe_grid(scorer, data, np.random.default_rng(0)))
+
+
+def test_matches_sklearn_after_save_and_load(scorer, model, data, tmp_path):
+    loaded = StumpScorer.load(scorer.save(str(tmp_path / "scorer")))
+    assert_same(loaded, model, data[FEATURES])
+
+
+def test_zero_score_is_positive_class(scorer, data):
+    row = data[FEATURES].iloc[:1]
+    tied = StumpScorer(scorer.features, scorer.thresholds, np.zeros_like(scorer.values), scorer.offsets,
+                       0.0, scorer.classes_)
+    assert tied.decision_function(row)[0] == 0
+    assert tied.predict(row)[0] == scorer.classes_[1]
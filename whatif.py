@@ -0,0 +1,46 @@
+"""What-if sweeps: how the predicted risk moves as one or two inputs vary.
+
+The patient's 13 inputs are copied into every row of a grid, the swept
+columns are overwritten with values across their form ranges, and the
+whole grid is scored with a single ``predict_proba`` call.
+"""
+
+import numpy as np
+
+from schema import FEATURES, RANGES
+
+# Inputs that take any value in their range; the rest are integer codes
+CONTINUOUS = {'oldpeak'}
+
+
+def grid_values(feature, points):
+    """Up to ``points`` evenly spaced values of ``feature`` across its form range."""
+    low, high = RANGES[feature]
+    if feature in CONTINUOUS:
+        return np.linspace(low, high, points)
+    return np.unique(np.linspace(low, high, min(points, int(high - low) + 1)).round())
+
+
+def risk(model, X):
+    if hasattr(model, "feature_names_in_"):
+        import pandas as pd
+        X = pd.DataFrame(X, columns=model.feature_names_in_)
+    return model.predict_proba(X)[:, list(model.classes_).index(1)]
+
+
+def sweep(model, base, feature, points=200):
+    """(values, risk) with ``feature`` swept and the other inputs held at ``base``."""
+    values = grid_values(feature, points)
+    X = np.tile(np.asarray(base, dtype=np.float64), (len(values), 1))
+    X[:, FEATURES.index(feature)] = values
+    return values, risk(model, X)
+
+
+def sweep_2d(model, base, x_feature, y_feature, points=200):
+    """(x values, y values, risk[y, x]) over the grid of both features."""
+    xs, ys = grid_values(x_feature, points), grid_values(y_feature, points)
+    X = np.tile(np.asarray(base, dtype=np.float64), (len(xs) * len(ys), 1))
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    X[:, FEATURES.index(x_feature)] = grid_x.ravel()
+    X[:, FEATURES.index(y_feature)] = grid_y.ravel()
+    return xs, ys, risk(model, X).reshape(len(ys), len(xs))